@@ -1,57 +1,19 @@
-import re
-import threading
-import tkinter as tk
-import customtkinter as ctk
-import serial
-import serial.tools.list_ports
-import requests
-from typing import List, Optional
-from CTkMessagebox import CTkMessagebox
-
-
-class RFIDReaderConfig:
-    """Configuration constants and utility methods for RFID reader."""
-    PRESET_VALUE = 0xFFFF
-    POLYNOMIAL = 0x8408
-    NO_READER = 'FF'
-
-    @staticmethod
-    def calculate_crc(cmd: str) -> bytes:
-        """Calculate CRC for RFID command."""
-        cmd_bytes = bytes.fromhex(cmd)
-        crc_value = RFIDReaderConfig.PRESET_VALUE
-
-        for byte in cmd_bytes:
-            crc_value ^= byte
-            for _ in range(8):
-                if crc_value & 0x0001:
-                    crc_value = (crc_value >> 1) ^ RFIDReaderConfig.POLYNOMIAL
-                else:
-                    crc_value >>= 1
+import time
+_STARTED = time.perf_counter()  # before the heavy imports, for --profile-startup
 
-        crc_h = (crc_value >> 8) & 0xFF
-        crc_l = crc_value & 0xFF
-
-        return cmd_bytes + bytes([crc_l, crc_h])
-
-
-class RFIDCommands:
-    """RFID communication command templates."""
+import customtkinter as ctk
 
-    def __init__(self, no_reader: str):
-        self.INVENTORY1 = f'06 {no_reader} 01 00 06'  # Read TID
-        self.INVENTORY2 = f'04 {no_reader} 0F'  # Read EPC
-        self.READ_TAG_MEM = f'12 {no_reader} 02 02 11 22 33 44 01 00 04 00 00 00 00 00 02'
-        self.WRITE_EPC = '0F 03 04 03 00 00 00 00 11 22 33 44 55 66'
-        self.SET_ADDRESS = '05 03 24 00'
+from rfid_protocol import RFIDReaderConfig
+from rfid_app import ReaderApp
+from rfid_cache import ResponseCache
+from rfid_pipeline import ScanPipeline, CallbackSink, HttpSink, DROP_OLDEST
+from rfid_startup import parse_startup_args
+from rfid_dispatch import ApiDispatcher
+from rfid_outbox import Outbox
 
 
-class RFIDReaderApp(ctk.CTk):
-    def __init__(self):
-        super().__init__()
-        self._setup_window()
-        self._initialize_variables()
-        self._setup_ui()
+class RFIDReaderApp(ReaderApp):
+    NO_PORT = "No Port Detected"
 
     def _setup_window(self):
         """Configure main window settings."""
@@ -64,23 +26,29 @@ class RFIDReaderApp(ctk.CTk):
 
     def _initialize_variables(self):
         """Initialize application state variables."""
-        self.port_state = "disabled"
-        self.set_state = "disabled"
-        self.scan_state = "disabled"
-
-        self.current_port = ""
-        self.current_position = ""
-        self.latest_uid = "00000000"
-
-        self.serial_connection = None
-        self.scan_thread = None
-
-        self.rfid_config = RFIDReaderConfig()
-        self.rfid_commands = RFIDCommands(RFIDReaderConfig.NO_READER)
+        super()._initialize_variables()
 
         # API Configuration
         self.api_enabled = ctk.BooleanVar(value=False)
         self.api_url = ctk.StringVar(value='https://registrasi.ptbi.co.id/web/rfid')
+        self.api_settings = (False, self.api_url.get())
+        self.api_enabled.trace_add("write", self._on_api_settings_change)
+        self.api_url.trace_add("write", self._on_api_settings_change)
+        self.api_dispatcher = ApiDispatcher(
+            on_result=self._on_api_result,
+            outbox=Outbox(RFIDReaderConfig.OUTBOX_PATH),
+            batch_size=RFIDReaderConfig.API_BATCH_SIZE,
+            batch_window=RFIDReaderConfig.API_BATCH_WINDOW,
+            cache=ResponseCache(RFIDReaderConfig.API_CACHE_TTL, RFIDReaderConfig.API_CACHE_MAX_ENTRIES)
+                if RFIDReaderConfig.API_CACHE_TTL else None
+        )
+        self.api_dispatcher.start()
+
+        self.pipeline = ScanPipeline([
+            CallbackSink(self._handle_uid, name='ui', policy=DROP_OLDEST, queue_size=16),
+            HttpSink(self.api_dispatcher, settings=lambda: self.api_settings, on_drop=self._on_api_drop),
+        ])
+        self.pipeline.start()
 
     def _setup_ui(self):
         """Set up the entire user interface."""
@@ -128,7 +96,7 @@ class RFIDReaderApp(ctk.CTk):
             font=ctk.CTkFont(size=12, weight="bold")
         ).grid(row=3, column=0, padx=20, pady=(10, 5), sticky="w")
 
-        self.position_entry = self._create_numeric_entry()
+        self.position_entry = self._create_numeric_entry(placeholder_text="Enter Position Number")
         self.position_entry.grid(row=4, column=0, padx=20, pady=(0, 10), sticky="ew")
 
         # Set Reader Button
@@ -140,28 +108,7 @@ class RFIDReaderApp(ctk.CTk):
             width=200
         )
         self.set_reader_button.grid(row=5, column=0, padx=20, pady=10)
-
-    def _create_numeric_entry(self):
-        """Create a numeric-only entry field."""
-        validate_cmd = self.register(self._validate_numeric)
-        entry = ctk.CTkEntry(
-            self.sidebar_frame,
-            validate="key",
-            validatecommand=(validate_cmd, "%P"),
-            placeholder_text="Enter Position Number"
-        )
-        entry.bind("<KeyRelease>", self._on_position_change)
-        return entry
-
-    @staticmethod
-    def _validate_numeric(value: str) -> bool:
-        """Validate that input is numeric."""
-        return bool(re.match(r"^[0-9]*$", value))
-
-    def _on_position_change(self, event):
-        """Update UI state when position changes."""
-        self.set_state = "active" if self.position_entry.get() else "disabled"
-        self.set_reader_button.configure(state=self.set_state)
+        self._create_scan_mode_section()
 
     def _create_main_content(self):
         """Create the main content area."""
@@ -237,6 +184,13 @@ class RFIDReaderApp(ctk.CTk):
         )
         self.api_status_label.pack(padx=20, pady=10)
 
+    def _on_api_settings_change(self, *args):
+        """Mirror the API settings so the reader thread never reads Tk variables."""
+        self.api_settings = (self.api_enabled.get(), self.api_url.get())
+        if self.api_dispatcher.cache is not None:
+            # Answers from the previous endpoint don't apply to the new one
+            self.api_dispatcher.cache.clear()
+
     def _toggle_api(self):
         """Toggle API functionality."""
         is_enabled = self.api_enabled.get()
@@ -244,136 +198,65 @@ class RFIDReaderApp(ctk.CTk):
         if not is_enabled:
             self.api_status_label.configure(text="API Disabled")
 
-    def _refresh_available_ports(self):
-        """Refresh and list available ports."""
-        ports = [port.device for port in serial.tools.list_ports.comports() if "CH340" in port.description]
-        ports = ports if ports else ["No Port Detected"]
-
-        self.port_menu.configure(values=ports)
-        self.port_state = "active" if ports != ["No Port Detected"] else "disabled"
-        self.port_menu.configure(state=self.port_state)
-
-    def _configure_reader(self):
-        """Configure the RFID reader connection."""
-        try:
-            port = self.port_menu.get()
-            position = self.position_entry.get()
-
-            self.serial_connection = serial.Serial(port, 57600, timeout=0.1)
-            self.current_port = port
-            self.current_position = position
-
-            self.scan_button.configure(state="active")
-            self.scan_state = "active"
-            CTkMessagebox(title="Success", message=f"Connected to port {port}")
-
-        except (serial.SerialException, TypeError) as e:
-            CTkMessagebox(title="PORT ERROR", message=str(e))
-            self.port_menu.set("No Port Detected")
-            self.position_entry.delete(0, tk.END)
-            self.scan_button.configure(state="disabled")
-            self.scan_state = "disabled"
-
-    def _toggle_scan(self):
-        """Toggle scanning state."""
-        if not hasattr(self, 'is_scanning'):
-            self.is_scanning = False
-
-        if not self.is_scanning:
-            self._start_scanning()
-        else:
-            self._stop_scanning()
+    def _show_reader(self, port, position):
+        """Confirm the new reader connection."""
+        self._show_message(title="Success", message=f"Connected to port {port}")
 
     def _start_scanning(self):
         """Start the RFID scanning process."""
         self.set_reader_button.configure(state='disabled')
         self.scan_button.configure(text="STOP SCAN", fg_color="red")
         self.is_scanning = True
-        self._scan_loop()
+        self.scan_session.start()
 
     def _stop_scanning(self):
         """Stop the RFID scanning process."""
         self.set_reader_button.configure(state='normal')
         self.scan_button.configure(text="START SCAN", fg_color=None)
         self.is_scanning = False
-        if self.scan_thread:
-            self.scan_thread.cancel()
-
-    def _scan_loop(self):
-        """Continuous scanning loop."""
-        if not self.is_scanning:
-            return
-
-        try:
-            self._send_scan_command()
-        except Exception as e:
-            print(f"Scan error: {e}")
-            self._stop_scanning()
-
-        self.scan_thread = threading.Timer(1.0, self._scan_loop)
-        self.scan_thread.start()
-
-    def _send_scan_command(self):
-        """Send scan command and process response."""
-        if not self.serial_connection:
-            return
-
-        data_scan = self.rfid_config.calculate_crc(self.rfid_commands.INVENTORY1)
-        self.serial_connection.write(data_scan)
-        response = self.serial_connection.read(512)
-
-        if not response:
-            self._handle_no_response()
-            return
-
-        uid = self._process_response(response)
-        if uid:
-            self._handle_uid(uid)
-
-    def _process_response(self, response):
-        """Process serial response and extract UID."""
-        response_hex = response.hex().upper()
-        hex_list = [response_hex[i:i + 2] for i in range(0, len(response_hex), 2)]
-        hex_space = ' '.join(hex_list)
-
-        if "FB" in hex_space or "FE" in hex_space or not hex_space:
-            return None
-
-        return hex_space[-6:].replace(" ", "")
+        if self.scan_session:
+            self.scan_session.stop()
+
+    def _shutdown(self):
+        """Also stop the API workers."""
+        super()._shutdown()
+        self.api_dispatcher.close()
+
+    def _show_status(self, text, hold=0.0):
+        """No status line here; reader state shows on the scan button only."""
+
+    def _handle_uid(self, event):
+        """Show a newly scanned tag; runs on the UI sink thread."""
+        self.latest_uid = event.uid
+        self.ui_bridge.post('uid', self.uid_display.configure, text=event.uid)
+
+    def _on_api_drop(self, event):
+        """The API queue had no room for a tag."""
+        self.ui_bridge.post(
+            'api', self.api_status_label.configure,
+            text="API Error: too many pending requests",
+            text_color="red"
+        )
 
-    def _handle_uid(self, uid):
-        """Handle detected UID."""
-        if uid == self.latest_uid:
+    def _on_api_result(self, result):
+        """Show an API result; called on a dispatcher thread."""
+        if result.error:
+            self.ui_bridge.post(
+                'api', self.api_status_label.configure,
+                text=f"API Error: {result.error}",
+                text_color="red"
+            )
             return
 
-        self.latest_uid = uid
-        self.uid_display.configure(text=self.latest_uid)
-
-        # API Integration (Optional)
-        if self.api_enabled.get():
-            try:
-                response = requests.get(
-                    self.api_url.get(),
-                    params={'pos': self.current_position, 'kode': uid}
-                )
-                status = f"API Response: {response.status_code}"
-                status_color = "#0dc900" if response.status_code == 200 else "red"
-                self.api_status_label.configure(text=status, text_color=status_color)
-            except Exception as e:
-                self.api_status_label.configure(
-                    text=f"API Error: {e}",
-                    text_color="red"
-                )
-
-    def _handle_no_response(self):
-        """Handle scenarios with no serial response."""
-        self.set_reader_button.configure(state='normal')
-        self.scan_button.configure(text="START SCAN", fg_color=None)
-        self.is_scanning = False
+        status = f"API Response: {result.status_code}{' (cached)' if result.cached else ''}"
+        status_color = "#0dc900" if result.status_code == 200 else "red"
+        self.ui_bridge.post('api', self.api_status_label.configure, text=status, text_color=status_color)
 
 
 def main():
-    app = RFIDReaderApp()
+    startup = parse_startup_args('Advanced RFID reader', _STARTED)
+    startup.mark("imports done")
+    app = RFIDReaderApp(startup)
     app.mainloop()
 
 
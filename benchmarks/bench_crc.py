@@ -0,0 +1,59 @@
+"""Micro-benchmark: table-driven CRC-16 vs. the original bit-by-bit loop."""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rfid_protocol import RFIDCommands, RFIDReaderConfig, crc16  # noqa: E402
+
+
+def legacy_calculate_crc(cmd: str) -> bytes:
+    """The implementation RFIDReaderConfig.calculate_crc shipped with originally."""
+    cmd_bytes = bytes.fromhex(cmd)
+    crc_value = 0xFFFF
+
+    for byte in cmd_bytes:
+        crc_value ^= byte
+        for _ in range(8):
+            if crc_value & 0x0001:
+                crc_value = (crc_value >> 1) ^ 0x8408
+            else:
+                crc_value >>= 1
+
+    crc_h = (crc_value >> 8) & 0xFF
+    crc_l = crc_value & 0xFF
+
+    return cmd_bytes + bytes([crc_l, crc_h])
+
+
+def run(number: int = 100000) -> dict:
+    commands = RFIDCommands(RFIDReaderConfig.NO_READER)
+    template = commands.INVENTORY1
+    payload = bytes(range(256)) * 4
+
+    assert legacy_calculate_crc(template) == RFIDReaderConfig.calculate_crc(template)
+
+    cases = {
+        'legacy_calculate_crc(INVENTORY1)': lambda: legacy_calculate_crc(template),
+        'calculate_crc(INVENTORY1)': lambda: RFIDReaderConfig.calculate_crc(template),
+        'frame(INVENTORY1)': lambda: commands.frame('INVENTORY1'),
+        'legacy_crc(1 KiB)': lambda: legacy_calculate_crc(payload.hex()),
+        'crc16(1 KiB)': lambda: crc16(payload),
+    }
+
+    results = {}
+    for name, func in cases.items():
+        loops = number if '1 KiB' not in name else max(number // 100, 1)
+        best = min(timeit.repeat(func, number=loops, repeat=5))
+        results[name] = best / loops * 1e9
+    return results
+
+
+def main():
+    for name, ns in run().items():
+        print(f"{name:<36} {ns:>12.1f} ns/op")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Benchmark suite for the scan pipeline, written out as JSON.
+
+Covers CRC, response decoding, dedup and the full tag -> API path against a
+simulated reader and the local stub server, so builds can be compared by
+numbers:
+
+    python benchmarks/run_benchmarks.py --label RFID_V3_build_1.0.3 --output build_1.0.3.json
+    python benchmarks/run_benchmarks.py --compare build_1.0.3.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+
+# Latency is measured at this fraction of the saturated throughput
+LATENCY_LOAD = 0.5
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_crc import legacy_calculate_crc  # noqa: E402
+from rfid_protocol import RFIDCommands, RFIDReaderConfig, FrameDecoder, crc16  # noqa: E402
+from rfid_cache import DedupCache  # noqa: E402
+from rfid_dispatch import ApiDispatcher  # noqa: E402
+from rfid_outbox import Outbox  # noqa: E402
+from rfid_reader import ScanSession  # noqa: E402
+from rfid_simulator import SimulatedReader, SimulatedSerial, random_tags  # noqa: E402
+from rfid_stub_server import StubRegistrationServer  # noqa: E402
+
+
+def legacy_process_response(response):
+    """The hex-string _process_response the apps shipped with originally."""
+    response_hex = response.hex().upper()
+    hex_list = [response_hex[i:i + 2] for i in range(0, len(response_hex), 2)]
+    hex_space = ' '.join(hex_list)
+
+    if "FB" in hex_space or "FE" in hex_space or not hex_space:
+        return None
+
+    return hex_space[-6:].replace(" ", "")
+
+
+def _per_op(func, number: int) -> float:
+    """Best-of-5 nanoseconds per call."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': pick(50) * 1000,
+        'p95_ms': pick(95) * 1000,
+        'p99_ms': pick(99) * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def _inventory_reply(tag_count: int) -> bytes:
+    reader = SimulatedReader(random_tags(tag_count, seed=tag_count))
+    return reader.handle(RFIDCommands(RFIDReaderConfig.NO_READER).frame('INVENTORY1'))
+
+
+def bench_crc(number: int) -> dict:
+    template = RFIDCommands(RFIDReaderConfig.NO_READER).INVENTORY1
+    commands = RFIDCommands(RFIDReaderConfig.NO_READER)
+    payload = bytes(range(256))
+    return {
+        'legacy_calculate_crc_ns': _per_op(lambda: legacy_calculate_crc(template), number),
+        'calculate_crc_ns': _per_op(lambda: RFIDReaderConfig.calculate_crc(template), number),
+        'precomputed_frame_ns': _per_op(lambda: commands.frame('INVENTORY1'), number),
+        'crc16_256_bytes_ns': _per_op(lambda: crc16(payload), max(number // 10, 1)),
+    }
+
+
+def bench_decode(number: int) -> dict:
+    results = {}
+    for tag_count in (1, 19):
+        reply = _inventory_reply(tag_count)
+        decoder = FrameDecoder()
+
+        def decode():
+            return [tag.hex().upper() for frame in decoder.feed(reply) for tag in frame.tags()]
+
+        results[f'legacy_{tag_count}_tags_ns'] = _per_op(lambda: legacy_process_response(reply), number)
+        results[f'frame_decoder_{tag_count}_tags_ns'] = _per_op(decode, number)
+    return results
+
+
+def bench_dedup(number: int) -> dict:
+    uids = [f'{i:024X}' for i in range(number)]
+    cache = DedupCache(window=60.0, max_entries=100000)
+
+    started = time.perf_counter()
+    for uid in uids:
+        cache.seen('1', uid)
+    admit = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for uid in uids[-1000:] * (number // 1000 or 1):
+        cache.seen('1', uid)
+    repeat = time.perf_counter() - started
+
+    return {
+        'admit_ns': admit / len(uids) * 1e9,
+        'duplicate_ns': repeat / (1000 * (number // 1000 or 1)) * 1e9,
+        'entries': len(cache),
+    }
+
+
+def bench_end_to_end(duration: float, tags_per_round: int, latency: float, use_outbox: bool,
+                     rate: float = 0.0) -> dict:
+    """Simulated reader -> ScanSession -> dedup -> ApiDispatcher -> stub server.
+
+    With ``rate`` (tags per second) the reader is polled on a schedule that
+    offers that load and the tag -> API latency is reported; keep it below
+    the saturated throughput, or the percentiles measure the backlog instead
+    of the path. Without it the reader is polled flat out and only the
+    throughput is meaningful.
+    """
+    sent_at = {}
+    latencies = []
+    lock = threading.Lock()
+
+    def on_result(result):
+        with lock:
+            started = sent_at.pop(result.uid, None)
+            if started is not None and result.delivered:
+                latencies.append(time.perf_counter() - started)
+
+    with StubRegistrationServer(latency=latency) as server, tempfile.TemporaryDirectory() as tmp:
+        outbox = Outbox(os.path.join(tmp, 'outbox.db')) if use_outbox else None
+        dispatcher = ApiDispatcher(server.url, workers=4, queue_size=100000, on_result=on_result, outbox=outbox)
+        dispatcher.start()
+
+        def on_tag(position, uid):
+            with lock:
+                sent_at[uid] = time.perf_counter()
+            dispatcher.submit(position, uid)
+
+        reader = SimulatedReader(latency=0.002)
+        session = ScanSession(SimulatedSerial(reader), '1', on_tag, dedup=DedupCache())
+
+        interval = tags_per_round / rate if rate else 0.0
+        rounds = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < duration:
+            if interval:
+                delay = started + rounds * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            # A fresh crowd every round, so every read is a new tag
+            reader.tags = random_tags(tags_per_round, seed=rounds)
+            session.poll()
+            rounds += 1
+        scan_elapsed = time.perf_counter() - started
+
+        deadline = time.monotonic() + 30
+        while dispatcher.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        while sent_at and time.monotonic() < deadline:
+            time.sleep(0.01)
+        total_elapsed = time.perf_counter() - started
+        dispatcher.close()
+        if outbox is not None:
+            outbox.close()
+
+    results = {
+        'rounds': rounds,
+        'read_ms': session.transport.total_elapsed / max(session.transport.reads, 1) * 1000,
+        'tags_read': session.tags,
+        'tags_delivered': len(latencies),
+        'scan_tags_per_second': session.tags / scan_elapsed,
+        'delivered_tags_per_second': len(latencies) / total_elapsed,
+        'server_requests': server.requests,
+    }
+    if rate:
+        results['offered_tags_per_second'] = rate
+        results['tag_to_api'] = _percentiles(latencies)
+    return results
+
+
+def bench_api_path(duration: float, tags_per_round: int, latency: float, use_outbox: bool) -> dict:
+    """Saturated throughput, then latency at a fraction of it."""
+    saturated = bench_end_to_end(duration, tags_per_round, latency, use_outbox)
+    rate = saturated['delivered_tags_per_second'] * LATENCY_LOAD
+    return {
+        'saturated': saturated,
+        'paced': bench_end_to_end(duration, tags_per_round, latency, use_outbox, rate=rate),
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(args) -> dict:
+    number = 2000 if args.quick else 20000
+    duration = 1.0 if args.quick else 5.0
+    return {
+        'label': args.label,
+        'revision': _git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': {
+            'crc': bench_crc(number),
+            'decode': bench_decode(number),
+            'dedup': bench_dedup(number * 5),
+            'end_to_end': bench_api_path(duration, 5, args.server_latency, use_outbox=False),
+            'end_to_end_outbox': bench_api_path(duration, 5, args.server_latency, use_outbox=True),
+        },
+    }
+
+
+def _flatten(results: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict):
+    """Print every metric next to the baseline with the relative change."""
+    now = _flatten(current['results'])
+    before = _flatten(baseline['results'])
+    print(f"{'metric':<48} {baseline.get('label') or 'baseline':>14} {current.get('label') or 'current':>14}  change")
+    for name, value in now.items():
+        if name not in before:
+            continue
+        old = before[name]
+        change = f"{(value - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{name:<48} {old:>14.2f} {value:>14.2f}  {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the RFID scan pipeline')
+    parser.add_argument('--label', default='', help='Build name stored with the results')
+    parser.add_argument('--output', help='Write results JSON to this file (default: stdout)')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--server-latency', type=float, default=0.005, help='Stub server delay per request')
+    parser.add_argument('--quick', action='store_true', help='Fewer iterations, for a smoke run')
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Offline allowlist of registered UIDs, kept in step with the server by deltas.
+
+The roster endpoint is polled with the version the cache already has:
+
+    GET <url>?since=<version>
+    {"version": 42, "full": false, "added": ["E280..."], "removed": []}
+
+``full`` replies (the answer to ``since=0``, or whenever the server can't
+produce a delta) replace the whole roster. ``rfid_stub_server.py`` serves
+this endpoint for testing.
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from rfid_protocol import RFIDReaderConfig
+from rfid_reader import ReaderWorker
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over UID strings.
+
+    Uses ~1.2 bytes per UID at a 1% false-positive rate, against roughly
+    100 bytes per entry for a set of strings. It can't forget a UID, so
+    removals have to rebuild it.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01, bits: Optional[bytearray] = None,
+                 hashes: Optional[int] = None):
+        capacity = max(capacity, 1)
+        if bits is None:
+            size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+            bits = bytearray((size + 7) // 8)
+        self.bits = bits
+        self.size = len(bits) * 8
+        self.hashes = hashes or max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+
+    def _hash(self, uid: str):
+        digest = hashlib.blake2b(uid.encode('ascii'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def add(self, uid: str):
+        h1, h2 = self._hash(uid)
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, uid: str) -> bool:
+        h1, h2 = self._hash(uid)
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class Allowlist:
+    """Registered UIDs in memory, persisted to ``path``.
+
+    Membership is a set lookup, or a Bloom filter lookup with ``bloom=True``
+    for rosters too large to hold as strings (a false positive lets through
+    about one unregistered tag in a hundred). Readers never take a lock:
+    updates either mutate the set in place or swap in a complete new one.
+    """
+
+    def __init__(self, path: Optional[str] = None, bloom: bool = False, error_rate: float = 0.01):
+        self.path = path
+        self.bloom = bloom
+        self.error_rate = error_rate
+        self.version = 0
+        self.synced_at = 0.0  # time.time() of the last successful sync
+
+        self._members = set()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    @property
+    def ready(self) -> bool:
+        """True once a roster has been loaded or synced; until then every verdict is a guess."""
+        return self.version > 0
+
+    def __contains__(self, uid: str) -> bool:
+        return uid.upper() in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def replace(self, uids: Iterable[str], version: int):
+        """Swap in a complete roster."""
+        uids = [uid.upper() for uid in uids]
+        if self.bloom:
+            # Room to double through deltas before the error rate climbs
+            members = BloomFilter(len(uids) * 2, self.error_rate)
+            for uid in uids:
+                members.add(uid)
+        else:
+            members = set(uids)
+        with self._lock:
+            self._members = members
+            self.version = version
+
+    def apply(self, added: Iterable[str], removed: Iterable[str], version: int) -> bool:
+        """Apply a delta; False if a Bloom filter would need a full roster to drop UIDs."""
+        removed = [uid.upper() for uid in removed]
+        with self._lock:
+            if removed and self.bloom:
+                return False
+            for uid in removed:
+                self._members.discard(uid)
+            for uid in added:
+                self._members.add(uid.upper())
+            self.version = version
+        return True
+
+    def save(self):
+        """Write the roster next to ``path`` and move it into place, so a crash keeps the old file."""
+        if not self.path:
+            return
+        with self._lock:
+            if self.bloom:
+                data = {'version': self.version, 'bloom': {
+                    'bits': base64.b64encode(bytes(self._members.bits)).decode('ascii'),
+                    'hashes': self._members.hashes,
+                    'count': self._members.count,
+                }}
+            else:
+                data = {'version': self.version, 'uids': sorted(self._members)}
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp, self.path)
+
+    def load(self):
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if 'bloom' in data and self.bloom:
+            members = BloomFilter(1, bits=bytearray(base64.b64decode(data['bloom']['bits'])),
+                                  hashes=data['bloom']['hashes'])
+            members.count = data['bloom']['count']
+            with self._lock:
+                self._members = members
+                self.version = data['version']
+        elif 'uids' in data:
+            self.replace(data['uids'], data['version'])
+        # A file in the other format is ignored; the next sync fetches a full roster
+
+
+class SyncResult(NamedTuple):
+    """Outcome of one roster sync, handed to ``on_sync``."""
+    version: int
+    added: int
+    removed: int
+    full: bool
+    error: Optional[str]
+
+
+class AllowlistSync:
+    """Poll the roster endpoint every ``interval`` seconds and apply what changed.
+
+    Runs on a :class:`~rfid_reader.ReaderWorker`, which also imports
+    ``requests`` on the first sync rather than at startup. Any failure
+    (network, bad reply, saving the roster) is reported through ``on_sync``
+    and retried on the next tick; the cached roster keeps answering in the
+    meantime.
+    """
+    DEFAULT_TIMEOUT = (3.05, 30)
+
+    def __init__(self, allowlist: Allowlist, url: str,
+                 interval: float = RFIDReaderConfig.ALLOWLIST_SYNC_INTERVAL,
+                 timeout=DEFAULT_TIMEOUT,
+                 on_sync: Optional[Callable[[SyncResult], None]] = None):
+        self.allowlist = allowlist
+        self.url = url
+        self.timeout = timeout
+        self.on_sync = on_sync
+        self.session = None
+        self.worker = ReaderWorker(self.sync, period=interval, name="rfid-allowlist")
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
+        self.worker.join(self.timeout[0])
+        if self.session is not None:
+            self.session.close()
+
+    def sync(self) -> SyncResult:
+        """Fetch and apply one delta (or full roster) now."""
+        import requests
+
+        if self.session is None:
+            self.session = requests.Session()
+        try:
+            result = self._sync(self.allowlist.version)
+            if result is None:
+                # A Bloom filter can't drop UIDs; start over from a full roster
+                result = self._sync(0)
+        except Exception as e:
+            # Anything (network, a malformed reply, a full disk on save) is
+            # reported and retried next tick; an escape would end the thread
+            result = SyncResult(self.allowlist.version, 0, 0, False, str(e) or type(e).__name__)
+        if self.on_sync:
+            self.on_sync(result)
+        return result
+
+    def _sync(self, since: int) -> Optional[SyncResult]:
+        response = self.session.get(self.url, params={'since': since}, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, dict):
+            raise ValueError(f"roster reply is a JSON {type(data).__name__}, not an object")
+        version = int(data['version'])
+        added = data.get('added', [])
+        removed = data.get('removed', [])
+
+        allowlist = self.allowlist
+        if data.get('full'):
+            allowlist.replace(added, version)
+        elif version == allowlist.version and not added and not removed:
+            allowlist.synced_at = time.time()
+            return SyncResult(version, 0, 0, False, None)
+        elif not allowlist.apply(added, removed, version):
+            return None
+
+        allowlist.synced_at = time.time()
+        allowlist.save()
+        return SyncResult(version, len(added), len(removed), bool(data.get('full')), None)
@@ -0,0 +1,401 @@
+"""Window, reader and port plumbing shared by the GUI apps.
+
+Subclasses add their pipeline sinks (and the dispatcher behind them) in
+:meth:`ReaderApp._initialize_variables` and say what to do with a tag in
+``_handle_uid``; everything between the serial port and the pipeline lives
+here. The default layout is the compact station window used by ``main.py``
+and ``main_offline.py``.
+"""
+import abc
+import re
+import time
+import tkinter as tk
+import customtkinter as ctk
+import serial
+
+from rfid_protocol import RFIDReaderConfig
+from rfid_reader import ScanSession
+from rfid_serial import open_reader
+from rfid_cache import DedupCache
+from rfid_ui import UiBridge
+from rfid_ports import PortMonitor
+from rfid_metrics import serve_metrics
+from rfid_startup import StartupProfile
+
+
+class ReaderApp(ctk.CTk, metaclass=abc.ABCMeta):
+    THEME = "blue"
+    UID_COLOR = "#fff"
+    DATA_PLACEHOLDER = "Scan RFID Tag"
+    NO_PORT = "Port Tidak Terdeteksi"
+    MAX_POSITION_LENGTH = 0  # longest position a sink can store; 0 = no limit
+
+    def __init__(self, startup=None):
+        super().__init__()
+        self.startup = startup or StartupProfile(time.perf_counter(), enabled=False)
+        if self.startup.enabled:
+            self.bind('<Map>', lambda event: self.startup.mark("window shown"), add='+')
+        self._setup_window()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._initialize_variables()
+        self._setup_ui()
+        self.ui_bridge.start()
+        self.port_monitor.start()
+
+    def _setup_window(self):
+        """Configure main window settings."""
+        self.geometry("800x400")
+        self.title("Power RFID V.3 By: Aziz")
+        ctk.set_appearance_mode("Light")
+        ctk.set_default_color_theme(self.THEME)
+        self.grid_columnconfigure(1, weight=1)
+
+    def _initialize_variables(self):
+        """Initialize application state variables.
+
+        Subclasses extend this to build and start ``self.pipeline``.
+        """
+        self.port_state = "disabled"
+        self.set_state = "disabled"
+        self.scan_state = "disabled"
+        self.is_scanning = False
+
+        self.current_port = ""
+        self.current_position = ""
+        self.latest_uid = "00000000"
+
+        self.scan_session = None
+        self.scan_period = RFIDReaderConfig.SCAN_PERIOD
+        self.scan_mode = RFIDReaderConfig.SCAN_MODE
+        self.ui_bridge = UiBridge(self, RFIDReaderConfig.UI_FPS)
+        self.port_monitor = PortMonitor(self._on_ports_changed)
+
+        self.dedup_cache = DedupCache(RFIDReaderConfig.DEDUP_WINDOW, RFIDReaderConfig.DEDUP_MAX_ENTRIES)
+        if RFIDReaderConfig.METRICS_PORT:
+            serve_metrics(RFIDReaderConfig.METRICS_PORT)
+        self.pipeline = None
+
+    def _setup_ui(self):
+        """Set up the entire user interface."""
+        self._create_sidebar()
+        self._create_main_content()
+        self._refresh_available_ports()
+
+    def _create_sidebar(self):
+        """Create the sidebar frame and its components."""
+        self.sidebar_frame = ctk.CTkFrame(self, width=200, corner_radius=0)
+        self.sidebar_frame.grid(row=0, column=0, rowspan=4, sticky="nsew")
+        self.sidebar_frame.grid_rowconfigure(5, weight=1)
+
+        self._create_sidebar_components()
+
+    def _create_sidebar_components(self):
+        """Create individual sidebar components."""
+        self._create_logo_label()
+        self._create_port_section()
+        self._create_position_section()
+        self._create_set_reader_button()
+        self._create_scan_mode_section()
+        self._create_tab_view()
+
+    def _create_logo_label(self):
+        ctk.CTkLabel(
+            self.sidebar_frame,
+            text="KONFIGURASI RFID",
+            font=ctk.CTkFont(size=15, weight="bold")
+        ).grid(row=0, column=0, padx=20, pady=(20, 10))
+
+    def _create_port_section(self):
+        """Create port selection components."""
+        ctk.CTkLabel(
+            self.sidebar_frame,
+            text="PORT",
+            font=ctk.CTkFont(size=10, weight="bold")
+        ).grid(row=1, column=0)
+
+        self.port_menu = ctk.CTkOptionMenu(
+            self.sidebar_frame,
+            state=self.port_state,
+            values=["Select Port"]
+        )
+        self.port_menu.grid(row=2, column=0, padx=20, pady=(0, 10))
+
+    def _create_position_section(self):
+        """Create position input components."""
+        ctk.CTkLabel(
+            self.sidebar_frame,
+            text="POSISI",
+            font=ctk.CTkFont(size=10, weight="bold")
+        ).grid(row=3, column=0)
+
+        self.position_entry = self._create_numeric_entry()
+        self.position_entry.grid(row=4, column=0, pady=(0, 25))
+
+    def _create_numeric_entry(self, **kwargs):
+        """Create a numeric-only entry field."""
+        validate_cmd = self.register(self._validate_numeric)
+        entry = ctk.CTkEntry(
+            self.sidebar_frame,
+            validate="key",
+            validatecommand=(validate_cmd, "%P"),
+            **kwargs
+        )
+        entry.bind("<KeyRelease>", self._on_position_change)
+        return entry
+
+    @staticmethod
+    def _validate_numeric(value: str) -> bool:
+        """Validate that input is numeric."""
+        return bool(re.match(r"^[0-9]*$", value))
+
+    def _on_position_change(self, event):
+        """Update UI state when position changes."""
+        self.set_state = "active" if self.position_entry.get() else "disabled"
+        self.set_reader_button.configure(state=self.set_state)
+
+    def _create_set_reader_button(self):
+        """Create the 'SET READER' button."""
+        self.set_reader_button = ctk.CTkButton(
+            self.sidebar_frame,
+            state=self.set_state,
+            text="SET READER",
+            width=100,
+            height=50,
+            font=ctk.CTkFont(weight="bold"),
+            command=self._configure_reader,
+            hover_color="blue"
+        )
+        self.set_reader_button.grid(row=5, column=0, padx=20, pady=10)
+
+    def _create_scan_mode_section(self):
+        """Create the polling / buffer mode selector."""
+        self.scan_mode_button = ctk.CTkSegmentedButton(
+            self.sidebar_frame,
+            values=["POLL", "BUFFER"],
+            command=self._on_scan_mode_change
+        )
+        self.scan_mode_button.set(self.scan_mode.upper())
+        self.scan_mode_button.grid(row=6, column=0, padx=20, pady=(0, 10), sticky="n")
+
+    def _on_scan_mode_change(self, value):
+        """Switch between polling every round and draining the reader's buffer."""
+        self.scan_mode = value.lower()
+        if self.scan_session:
+            self.scan_session.mode = self.scan_mode
+
+    def _create_tab_view(self):
+        """Create a tab view for port and position display."""
+        self.tab_view = ctk.CTkTabview(self.sidebar_frame, width=120, height=80)
+        self.tab_view.grid(row=7, column=0)
+        self.tab_view.add("PORT")
+        self.tab_view.add("POS")
+
+    def _create_main_content(self):
+        """Create the main content area."""
+        self.uid_var = ctk.StringVar(value="0000000")
+
+        # UID Display Button
+        self.uid_display = ctk.CTkButton(
+            self, width=500, height=20,
+            state="disabled",
+            corner_radius=0,
+            text_color_disabled=self.UID_COLOR,
+            text=self.latest_uid,
+            font=ctk.CTkFont(weight="bold", size=36)
+        )
+        self.uid_display.grid(row=0, column=1, columnspan=2, pady=(5, 20), sticky="nsew")
+
+        # Latest UID Label
+        ctk.CTkLabel(
+            self, text="USER ID DATA",
+            font=ctk.CTkFont(size=18, weight="bold")
+        ).grid(row=1, column=1, pady=(0, 10))
+
+        # Data Entry
+        self.data_entry = ctk.CTkEntry(
+            self,
+            state="disabled",
+            placeholder_text=self.DATA_PLACEHOLDER,
+            textvariable=self.uid_var,
+            font=ctk.CTkFont(family="Arial", size=30)
+        )
+        self.data_entry.grid(row=2, column=1, columnspan=2, padx=(20, 20), pady=(0, 10), sticky="nsew")
+
+        # Scan Button
+        self.scan_button = ctk.CTkButton(
+            self,
+            state=self.scan_state,
+            text="SCAN DATA",
+            width=200, height=50,
+            font=ctk.CTkFont(weight="bold"),
+            hover_color="darkgreen",
+            command=self._toggle_scan
+        )
+        self.scan_button.grid(row=3, column=1, padx=20, pady=0)
+
+    def _refresh_available_ports(self):
+        """List the reader ports the port monitor currently sees."""
+        ports = self.port_monitor.ports or [self.NO_PORT]
+
+        self.port_menu.configure(values=ports)
+        if self.port_menu.get() not in ports:
+            self.port_menu.set(ports[0])
+        self.port_state = "active" if ports != [self.NO_PORT] else "disabled"
+        self.port_menu.configure(state=self.port_state)
+
+    def _on_ports_changed(self, events):
+        """Reader plugged in or pulled out; called on the port monitor thread."""
+        self.ui_bridge.post('ports', self._refresh_available_ports)
+
+    def _configure_reader(self):
+        """Configure the RFID reader connection."""
+        try:
+            port = self.port_menu.get()
+            position = self.position_entry.get()
+            if self.MAX_POSITION_LENGTH and len(position) > self.MAX_POSITION_LENGTH:
+                self._show_message(
+                    title="POSITION ERROR",
+                    message=f"Position can be at most {self.MAX_POSITION_LENGTH} digits"
+                )
+                return
+
+            if self.scan_session:
+                # Release the previous port first; it may be the same one.
+                # Its last poll has to finish before the port goes away
+                self.scan_session.stop()
+                self.scan_session.worker.join(1.0)
+                self.scan_session.connection.close()
+                self.scan_session = None
+            connection = open_reader(port)
+            baud = connection.baudrate
+            self.scan_session = ScanSession(
+                connection,
+                position,
+                self.pipeline.publish,
+                dedup=self.dedup_cache,
+                period=self.scan_period,
+                mode=self.scan_mode,
+                on_frame=self._on_frame,
+                on_duplicate=self._on_duplicate,
+                on_no_response=self._on_no_response,
+                on_error=self._on_scan_error,
+                reopen=lambda: open_reader(port, baud),
+                on_state=self._on_link_state
+            )
+            self.current_port = port
+            self.current_position = position
+
+            self.scan_button.configure(state="active")
+            self.scan_state = "active"
+            self._show_reader(port, position)
+
+        except (serial.SerialException, TypeError) as e:
+            self._show_message(title="PORT ERROR", message=str(e))
+            self.port_menu.set(self.NO_PORT)
+            self.position_entry.delete(0, tk.END)
+            self.scan_button.configure(state="disabled")
+            self.scan_state = "disabled"
+
+    def _show_reader(self, port, position):
+        """Update tab view with current port and position."""
+        ctk.CTkLabel(
+            self.tab_view.tab("PORT"),
+            text=port,
+            font=ctk.CTkFont(size=28, weight="bold")
+        ).grid(row=0, column=0, padx=20, pady=20)
+
+        ctk.CTkLabel(
+            self.tab_view.tab("POS"),
+            text=position,
+            font=ctk.CTkFont(size=28, weight="bold")
+        ).grid(row=0, column=0, padx=20, pady=20)
+
+    def _toggle_scan(self):
+        """Toggle scanning state."""
+        if not self.is_scanning:
+            self._start_scanning()
+        else:
+            self._stop_scanning()
+
+    def _start_scanning(self):
+        """Start the RFID scanning process."""
+        self.set_reader_button.configure(state='disabled')
+        self.scan_button.configure(text="STOP SCAN")
+        self.uid_var.set("")
+        self.is_scanning = True
+        self.scan_session.start()
+
+    def _stop_scanning(self):
+        """Stop the RFID scanning process."""
+        self.set_reader_button.configure(state='normal')
+        self.scan_button.configure(text="START SCAN")
+        self.uid_var.set("")
+        self.is_scanning = False
+        if self.scan_session:
+            self.scan_session.stop()
+
+    def _on_scan_error(self, e):
+        """Stop scanning when a poll raises; called on the reader thread."""
+        print(f"Scan error: {e}")
+        self.ui_bridge.post('scan', self._stop_scanning)
+
+    def _on_frame(self, frame):
+        """Report reader status replies; called on the reader thread."""
+        self.startup.mark("first poll")
+        if not frame.ok:
+            self._show_status("Card Not Detected" if frame.no_tag else f"Reader Error: {frame.message}")
+
+    def _on_no_response(self, session):
+        """The reader sent nothing this round; called on the reader thread."""
+        self.startup.mark("first poll")
+
+    def _on_duplicate(self, position, uid):
+        """A tag already reported within the dedup window; called on the reader thread."""
+        self._show_status("DUPLICATE DATA")
+
+    @abc.abstractmethod
+    def _handle_uid(self, event):
+        """Show a newly scanned tag; runs on the UI sink thread."""
+
+    def _on_link_state(self, reconnector):
+        """Reader lost or back again; called on the reader thread."""
+        if reconnector.connected:
+            self._show_status(f"Reader reconnected\n{reconnector.downtime:.1f} s down", hold=RFIDReaderConfig.STATUS_HOLD)
+        else:
+            self._show_status("NO PORT DETECTED\nReconnecting...")
+        self.ui_bridge.post('link', self._show_link_state, reconnector.connected)
+
+    def _on_close(self):
+        """Window closed: stop the reader, let the sinks finish, then quit."""
+        self._shutdown()
+        self.destroy()
+
+    def _shutdown(self):
+        """Stop the threads from the reader downstream.
+
+        Subclasses extend this to close whatever their sinks hand work to.
+        """
+        self.port_monitor.stop()
+        self.ui_bridge.stop()
+        if self.scan_session:
+            self.scan_session.stop()
+            self.scan_session.worker.join(1.0)
+            self.scan_session.connection.close()
+            self.scan_session = None
+        if self.pipeline is not None:
+            # Drains each sink's queue and closes it (journal, history)
+            self.pipeline.stop()
+
+    def _show_message(self, title, message):
+        """Pop up a message box; CTkMessagebox is imported on first use."""
+        from CTkMessagebox import CTkMessagebox
+        CTkMessagebox(title=title, message=message)
+
+    def _show_link_state(self, connected):
+        """Show on the scan button whether the reader is being reconnected."""
+        if self.is_scanning:
+            self.scan_button.configure(text="STOP SCAN" if connected else "RECONNECTING...")
+
+    def _show_status(self, text, hold=0.0):
+        """Show a status line; safe to call from worker threads."""
+        self.ui_bridge.post('status', self.uid_var.set, text, hold=hold)
@@ -0,0 +1,129 @@
+"""Bounded, time-windowed caches used on the scan path."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class DedupCache:
+    """Suppress repeat reads of the same tag at the same position.
+
+    A (position, uid) pair is admitted once and then reported as a duplicate
+    until ``window`` seconds have passed, after which it is admitted again.
+    Entries stay in admission order, so expired ones are always at the front
+    and are evicted in amortised O(1); ``max_entries`` caps memory by
+    dropping the oldest entry when full.
+    """
+
+    def __init__(self, window: float = 60.0, max_entries: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, position: str, uid: str) -> bool:
+        """True if this pair was admitted within the window; admits it otherwise."""
+        key = (position, uid)
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+
+            admitted = self._entries.get(key)
+            if admitted is not None and now - admitted < self.window:
+                return True
+
+            self._entries[key] = now
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return False
+
+    def forget(self, position: str, uid: str):
+        """Let the next read of this pair through immediately."""
+        with self._lock:
+            self._entries.pop((position, uid), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        entries = self._entries
+        cutoff = now - self.window
+        while entries:
+            key: Hashable = next(iter(entries))
+            if entries[key] > cutoff:
+                break
+            del entries[key]
+
+
+class ResponseCache:
+    """Remember API answers for ``ttl`` seconds so repeat taps skip the request.
+
+    Every entry lives for the same ``ttl``, so insertion order is expiry
+    order and expired entries are dropped from the front like in
+    :class:`DedupCache`. ``max_entries`` drops the oldest answer when full.
+    ``hits`` and ``misses`` count lookups.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()  # key -> (stored, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The cached value, or None if there is none or it has expired."""
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        now = self.clock()
+        with self._lock:
+            self._entries[key] = (now, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        entries = self._entries
+        cutoff = now - self.ttl
+        while entries:
+            key: Hashable = next(iter(entries))
+            if entries[key][0] > cutoff:
+                break
+            del entries[key]
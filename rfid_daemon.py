@@ -0,0 +1,259 @@
+"""Headless RFID gate: scan, decode, dedup and report without loading any GUI.
+
+Examples:
+    python rfid_daemon.py --port /dev/ttyUSB0 --position 3
+    python rfid_daemon.py --reader COM3=1 --reader COM4=2 --stats-interval 10
+    python rfid_daemon.py --port COM3 --position 3 --no-api --jsonl > scans.jsonl
+"""
+import argparse
+import logging
+import signal
+import threading
+
+import serial
+
+from rfid_protocol import RFIDReaderConfig, BAUD_CODES
+from rfid_pool import ReaderPool
+from rfid_reader import SCAN_MODES
+from rfid_cache import DedupCache, ResponseCache
+from rfid_dispatch import ApiDispatcher
+from rfid_outbox import Outbox
+from rfid_metrics import serve_metrics
+from rfid_ports import PortMonitor
+from rfid_pipeline import ScanPipeline, CallbackSink, HttpSink, HistorySink, LogSink, JsonlSink
+from rfid_history import ScanHistory
+from rfid_allowlist import Allowlist, AllowlistSync
+
+DEFAULT_API_URL = 'https://registrasi.ptbi.co.id/web/rfid'
+
+log = logging.getLogger("rfid_daemon")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Headless RFID reader daemon')
+    parser.add_argument('--port', help='Serial port of the reader, e.g. COM3 or /dev/ttyUSB0')
+    parser.add_argument('--position', help='Gate position reported as "pos"')
+    parser.add_argument('--reader', action='append', default=[], metavar='PORT=POSITION',
+                        help='Add a reader bound to a position; repeat for several readers')
+    parser.add_argument('--api-url', default=DEFAULT_API_URL, help='Registration API endpoint')
+    parser.add_argument('--no-api', action='store_true', help='Only log tags, never call the API')
+    parser.add_argument('--jsonl', action='store_true',
+                        help='Write every tag to stdout as a JSON line (logging stays on stderr)')
+    parser.add_argument('--log-file', metavar='PATH', help='Append every tag to a tab-separated file')
+    parser.add_argument('--history', metavar='PATH', default=RFIDReaderConfig.HISTORY_PATH,
+                        help='SQLite scan history for last-seen lookups; empty string turns it off')
+    parser.add_argument('--allowlist-url', default=RFIDReaderConfig.ALLOWLIST_URL,
+                        help='Roster sync endpoint; tags are then logged as registered or not without waiting for the API')
+    parser.add_argument('--allowlist', metavar='PATH', default=RFIDReaderConfig.ALLOWLIST_PATH,
+                        help='Where the synced roster is kept between runs')
+    parser.add_argument('--bloom', action='store_true', help='Hold the roster as a Bloom filter (very large rosters)')
+    parser.add_argument('--baud', type=int, default=RFIDReaderConfig.BAUD_RATE,
+                        help='Reader baud rate (0 = detect it by probing the common rates)')
+    parser.add_argument('--switch-baud', type=int, default=RFIDReaderConfig.TARGET_BAUD, choices=[0, *BAUD_CODES],
+                        help='Move the reader to this baud rate after connecting, e.g. 115200')
+    parser.add_argument('--period', type=float, default=RFIDReaderConfig.SCAN_PERIOD, help='Seconds between polls')
+    parser.add_argument('--mode', choices=SCAN_MODES, default=RFIDReaderConfig.SCAN_MODE,
+                        help="'poll' reads tags every round; 'buffer' lets the reader collect them and drains in bulk")
+    parser.add_argument('--dedup-window', type=float, default=RFIDReaderConfig.DEDUP_WINDOW,
+                        help='Seconds before the same tag is reported again')
+    parser.add_argument('--outbox', default=RFIDReaderConfig.OUTBOX_PATH,
+                        help='SQLite outbox path; empty string keeps events in memory only')
+    parser.add_argument('--api-cache-ttl', type=float, default=RFIDReaderConfig.API_CACHE_TTL,
+                        help='Reuse the server answer for a tag at a position for N seconds (0 = always ask)')
+    parser.add_argument('--batch-size', type=int, default=RFIDReaderConfig.API_BATCH_SIZE,
+                        help='Upload scans in batches of up to this many (0 = one GET per tag)')
+    parser.add_argument('--stats-interval', type=float, default=0,
+                        help='Log per-reader throughput every N seconds (0 = only at exit)')
+    parser.add_argument('--metrics-port', type=int, default=RFIDReaderConfig.METRICS_PORT,
+                        help='Serve Prometheus metrics on 127.0.0.1:PORT/metrics (0 = off)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every API result')
+    return parser
+
+
+def parse_readers(args) -> list:
+    """(port, position) pairs from --port/--position and every --reader."""
+    readers = []
+    if args.port or args.position:
+        if not (args.port and args.position):
+            raise ValueError("--port and --position must be given together")
+        readers.append((args.port, args.position))
+    for spec in args.reader:
+        port, sep, position = spec.rpartition('=')
+        if not sep or not port or not position:
+            raise ValueError(f"--reader expects PORT=POSITION, got {spec!r}")
+        readers.append((port, position))
+    if not readers:
+        raise ValueError("no reader given; use --port/--position or --reader")
+    return readers
+
+
+def _log_stats(pool):
+    for stats in pool.stats():
+        log.info(
+            "%s pos=%s: %d polls (%.1f/s), %d tags (%.1f/s), %d duplicates, %d empty reads, "
+            "%.1f ms per read, %d reconnects, %.1f s down",
+            stats.port, stats.position, stats.polls, stats.polls_per_second,
+            stats.tags, stats.tags_per_second, stats.duplicates, stats.empty_reads,
+            stats.read_ms, stats.reconnects, stats.downtime
+        )
+
+
+def _log_pipeline_stats(pipeline):
+    for name, (handled, dropped, pending) in pipeline.stats().items():
+        log.info("%s sink: %d handled, %d dropped, %d pending", name, handled, dropped, pending)
+
+
+def _log_cache_stats(dispatcher):
+    if dispatcher is not None and dispatcher.cache is not None:
+        cache = dispatcher.cache
+        log.info("API cache: %d hits, %d misses (%.0f%% hit rate), %d answers held",
+                 cache.hits, cache.misses, cache.hit_rate * 100, len(cache))
+
+
+def _log_sync(result):
+    if result.error:
+        log.warning("Roster sync failed, keeping version %d: %s", result.version, result.error)
+    elif result.full or result.added or result.removed:
+        log.info("Roster version %d: %s%d added, %d removed", result.version,
+                 "full roster, " if result.full else "", result.added, result.removed)
+
+
+def _log_link_state(port, reconnector):
+    if reconnector.connected:
+        log.info("%s: reader back after %d reconnects, %.1f s down in total",
+                 port, reconnector.reconnects, reconnector.downtime)
+    else:
+        log.warning("%s: reader lost (%s), reconnecting", port, reconnector.last_error or "no response")
+
+
+def _log_port_events(events):
+    for event in events:
+        log.info("Reader port %s: %s (%s)", event.kind, event.port.device, event.port.description)
+
+
+def _log_api_result(result):
+    if result.error:
+        log.warning("API error for %s: %s", result.uid, result.error)
+    elif result.cached:
+        log.info("API %s for %s (cached)", result.status_code, result.uid)
+    else:
+        log.info("API %s for %s (%.0f ms)", result.status_code, result.uid, result.elapsed * 1000)
+
+
+def run(args) -> int:
+    try:
+        readers = parse_readers(args)
+    except ValueError as e:
+        log.error("%s", e)
+        return 2
+
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        log.info("Metrics on http://127.0.0.1:%d/metrics", args.metrics_port)
+
+    dispatcher = None
+    if not args.no_api:
+        dispatcher = ApiDispatcher(
+            args.api_url,
+            on_result=_log_api_result if args.verbose else None,
+            outbox=Outbox(args.outbox) if args.outbox else None,
+            batch_size=args.batch_size,
+            batch_window=RFIDReaderConfig.API_BATCH_WINDOW,
+            cache=ResponseCache(args.api_cache_ttl, RFIDReaderConfig.API_CACHE_MAX_ENTRIES)
+                if args.api_cache_ttl else None
+        )
+        dispatcher.start()
+
+    allowlist = allowlist_sync = None
+    if args.allowlist_url:
+        allowlist = Allowlist(args.allowlist, bloom=args.bloom)
+        allowlist_sync = AllowlistSync(allowlist, args.allowlist_url, on_sync=_log_sync)
+        allowlist_sync.start()
+
+    def log_tag(event):
+        if allowlist is not None and allowlist.ready:
+            verdict = "registered" if event.uid in allowlist else "NOT registered"
+            log.info("TAG pos=%s uid=%s %s", event.position, event.uid, verdict)
+        else:
+            log.info("TAG pos=%s uid=%s", event.position, event.uid)
+
+    pipeline = ScanPipeline([CallbackSink(log_tag, name='console')])
+    if dispatcher is not None:
+        pipeline.add(HttpSink(dispatcher, on_drop=lambda event: log.warning("API queue full, dropped %s", event.uid)))
+    if args.jsonl:
+        pipeline.add(JsonlSink())
+    if args.log_file:
+        pipeline.add(LogSink(args.log_file))
+    if args.history:
+        history = ScanHistory(args.history)
+        history.start()
+        pipeline.add(HistorySink(history))
+
+    stopped = threading.Event()
+
+    def on_error(port, e):
+        log.error("Scan error on %s: %s", port, e)
+
+    pool = ReaderPool(
+        pipeline.publish,
+        dedup=DedupCache(args.dedup_window, RFIDReaderConfig.DEDUP_MAX_ENTRIES),
+        period=args.period,
+        baud=args.baud,
+        on_error=on_error,
+        mode=args.mode,
+        target_baud=args.switch_baud,
+        on_state=_log_link_state
+    )
+    for port, position in readers:
+        try:
+            pool.add(port, position)
+        except serial.SerialException as e:
+            log.error("Cannot open %s: %s", port, e)
+            pool.stop()
+            pipeline.stop()
+            if allowlist_sync is not None:
+                allowlist_sync.stop()
+            if dispatcher is not None:
+                dispatcher.close()
+            return 1
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopped.set())
+
+    port_monitor = PortMonitor(_log_port_events)
+    port_monitor.refresh()
+    port_monitor.start()
+
+    for port, position in readers:
+        log.info("Scanning %s at position %s (%d baud)", port, position, pool.sessions[port].connection.baudrate)
+    pipeline.start()
+    pool.start()
+    try:
+        while not stopped.wait(args.stats_interval or 1.0):
+            if args.stats_interval:
+                _log_stats(pool)
+                _log_pipeline_stats(pipeline)
+                _log_cache_stats(dispatcher)
+    finally:
+        port_monitor.stop()
+        pool.stop()
+        # Sinks finish what is queued before the dispatcher flushes its own queue
+        pipeline.stop()
+        if allowlist_sync is not None:
+            allowlist_sync.stop()
+        if dispatcher is not None:
+            dispatcher.close()
+        _log_stats(pool)
+        _log_pipeline_stats(pipeline)
+        _log_cache_stats(dispatcher)
+    return 0
+
+
+def main():
+    args = build_parser().parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    raise SystemExit(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+"""Background delivery of scanned UIDs to the registration API."""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from rfid_cache import ResponseCache
+from rfid_metrics import METRICS
+from rfid_outbox import Outbox
+
+# Server answers that mean "try again later" rather than "no"
+RETRY_STATUSES = frozenset((408, 429))
+
+
+class ApiResult(NamedTuple):
+    """Outcome of one API call, handed to the ``on_result`` callback."""
+    uid: str
+    position: str
+    status_code: Optional[int]
+    error: Optional[str]
+    elapsed: float
+    cached: bool = False  # answered from the ResponseCache, no request made
+
+    @property
+    def delivered(self) -> bool:
+        """The server answered; 5xx, timeouts, rate limits and network errors are worth retrying."""
+        return (self.status_code is not None and self.status_code < 500
+                and self.status_code not in RETRY_STATUSES)
+
+
+def _accepted(response) -> Optional[int]:
+    """The ``accepted`` count of a batch reply, or None if it has none."""
+    try:
+        accepted = response.json().get('accepted')
+    except (ValueError, AttributeError):
+        return None
+    return accepted if isinstance(accepted, int) else None
+
+
+class ApiDispatcher:
+    """Send UID reports from a small worker pool so scanning never waits.
+
+    Requests go through a bounded queue and one keep-alive
+    ``requests.Session``, so repeated calls reuse the TCP/TLS connection.
+    ``requests`` is only imported when the first report is sent, which
+    keeps it off the startup path of the GUI apps.
+    Results are reported through ``on_result`` on a worker thread.
+
+    With an :class:`~rfid_outbox.Outbox` every report is written to disk
+    first and a flusher thread drains it oldest-first through the pool.
+    A failed event backs off on its own (doubling per attempt, up to
+    ``RETRY_MAX``) while the rest keep flowing, so newer scans can overtake
+    it while it waits. As soon as any delivery succeeds every waiting event
+    is made due again, so after an outage the backlog goes out oldest first
+    rather than each event sitting out its own backoff. An event is moved
+    to the outbox's dead letter table after failing ``MAX_ATTEMPTS`` times
+    in rounds where other events got through; attempts made while nothing
+    gets through at all (the server or network is down, or answering 5xx
+    to everything) don't count, so an outage delays events but never
+    discards them.
+
+    ``batch_size`` > 0 turns on batch mode: reports collected over
+    ``batch_window`` seconds (or until ``batch_size`` are waiting) go out as
+    one JSON POST to ``batch_url``, sent one after another by a single
+    thread so the server sees them in scan order. If the server answers
+    that with a status that says it doesn't do batches, or with a reply
+    that doesn't confirm every event, the dispatcher falls back to one GET
+    per tag for the rest of the session.
+
+    With a :class:`~rfid_cache.ResponseCache`, a (position, uid) the server
+    answered within the cache's TTL is not sent again: :meth:`submit`
+    reports the stored answer through ``on_result`` straight away.
+    """
+    DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+    FLUSH_LIMIT = 200
+    RETRY_MIN = 0.5
+    RETRY_MAX = 60.0
+    MAX_ATTEMPTS = 10
+    BATCH_UNSUPPORTED = frozenset((400, 404, 405, 415, 501))
+
+    def __init__(self, url: str = "", workers: int = 2, queue_size: int = 256,
+                 timeout=DEFAULT_TIMEOUT,
+                 on_result: Optional[Callable[[ApiResult], None]] = None,
+                 outbox: Optional[Outbox] = None,
+                 batch_size: int = 0, batch_window: float = 0.5,
+                 batch_url: Optional[str] = None,
+                 cache: Optional[ResponseCache] = None):
+        self.url = url
+        self.workers = workers
+        self.timeout = timeout
+        self.on_result = on_result
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.batch_url = batch_url
+        self.batch_supported = batch_size > 0
+        self.cache = cache
+
+        self._session = None
+        self._session_lock = threading.Lock()
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._executor = None
+        self._wakeup = threading.Event()
+        self._closing = threading.Event()
+
+    @property
+    def session(self):
+        """The keep-alive session, created on first use."""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def start(self):
+        """Start the worker threads; does nothing if already started."""
+        if self._threads:
+            return
+        self._closing.clear()
+
+        if self.outbox is not None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rfid-api")
+            thread = threading.Thread(target=self._flush_outbox, name="rfid-outbox", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            return
+
+        if self.batch_supported:
+            # One consumer keeps batches in scan order; the pool only serves
+            # the per-tag fallback
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rfid-api")
+            thread = threading.Thread(target=self._run, name="rfid-api-batch", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            return
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"rfid-api-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, position: str, uid: str, url: Optional[str] = None) -> bool:
+        """Queue a UID report; returns False if it could not be queued."""
+        self.start()
+        url = url or self.url
+
+        if self.cache is not None:
+            cached = self.cache.get((position, uid))
+            METRICS.inc('api_cache', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                if self.on_result:
+                    self.on_result(cached._replace(elapsed=0.0, cached=True))
+                return True
+
+        if self.outbox is not None:
+            self.outbox.add(url, position, uid)
+            self._wakeup.set()
+            return True
+
+        try:
+            self._queue.put_nowait((url, position, uid, time.monotonic()))
+        except queue.Full:
+            METRICS.inc('api_dropped')
+            return False
+        return True
+
+    def pending(self) -> int:
+        if self.outbox is not None:
+            return len(self.outbox)
+        return self._queue.qsize()
+
+    def close(self, timeout: float = 1.0):
+        """Let the workers finish what they hold, then close the session."""
+        self._closing.set()
+        self._wakeup.set()
+        if self.outbox is None:
+            for _ in self._threads:
+                try:
+                    self._queue.put((None, None, None, None), timeout=timeout)
+                except queue.Full:
+                    break
+
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._session is not None:
+            self._session.close()
+
+    def send(self, url: str, position: str, uid: str) -> ApiResult:
+        """Make one API call on the calling thread."""
+        import requests
+
+        session = self.session
+        started = time.monotonic()
+        try:
+            response = session.get(url, params={'pos': position, 'kode': uid}, timeout=self.timeout)
+            result = ApiResult(uid, position, response.status_code, None, time.monotonic() - started)
+        except requests.RequestException as e:
+            result = ApiResult(uid, position, None, str(e), time.monotonic() - started)
+        METRICS.observe('api_request', result.elapsed)
+        return result
+
+    def send_batch(self, url: str, events: List[Tuple[str, str]]) -> List[ApiResult]:
+        """POST several (position, uid) reports in one request, in order.
+
+        The batch only counts as delivered when the reply confirms it with
+        ``{"accepted": len(events)}``. A 5xx or rate-limit answer fails the
+        whole batch for a later retry; any other answer (unsupported, or
+        one that doesn't confirm every event) switches to :meth:`send` per
+        report from then on.
+        """
+        if self.batch_supported:
+            import requests
+
+            session = self.session
+            started = time.monotonic()
+            payload = {'events': [{'pos': position, 'kode': uid} for position, uid in events]}
+            try:
+                response = session.post(self.batch_url or url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                elapsed = time.monotonic() - started
+                METRICS.observe('api_request', elapsed)
+                return [ApiResult(uid, position, None, str(e), elapsed) for position, uid in events]
+
+            elapsed = time.monotonic() - started
+            METRICS.observe('api_request', elapsed)
+            status = response.status_code
+            retry_later = (status >= 500 or status in RETRY_STATUSES) and status not in self.BATCH_UNSUPPORTED
+            if retry_later or (status < 300 and _accepted(response) == len(events)):
+                return [ApiResult(uid, position, status, None, elapsed) for position, uid in events]
+            self.batch_supported = False
+
+        return [self.send(url, position, uid) for position, uid in events]
+
+    def _deliver(self, items: List[Tuple[str, str, str]]) -> List[ApiResult]:
+        """Send (url, position, uid) items, batched per URL when enabled."""
+        if not self.batch_supported:
+            if self._executor is not None:
+                return list(self._executor.map(lambda item: self.send(*item), items))
+            return [self.send(*item) for item in items]
+
+        results = []
+        start = 0
+        while start < len(items):
+            # Consecutive items for the same URL, at most batch_size of them
+            url = items[start][0]
+            end = start
+            while end < len(items) and end - start < self.batch_size and items[end][0] == url:
+                end += 1
+            results.extend(self.send_batch(url, [(position, uid) for _, position, uid in items[start:end]]))
+            start = end
+        return results
+
+    def _report(self, result: ApiResult, waited: float):
+        """Count and cache a result, then hand it to ``on_result``."""
+        self._record(result, waited)
+        if self.cache is not None and result.delivered:
+            self.cache.put((result.position, result.uid), result)
+        if self.on_result:
+            self.on_result(result)
+
+    @staticmethod
+    def _record(result: ApiResult, waited: float):
+        """Count the outcome and how long the tag took to reach the API."""
+        if result.error:
+            METRICS.inc('api_results', result='error')
+        elif result.delivered:
+            METRICS.inc('api_results', result='ok')
+            METRICS.observe('tag_to_api', waited)
+        else:
+            METRICS.inc('api_results', result='server_error')
+
+    def _take_batch(self) -> List[Tuple[str, str, str, float]]:
+        """Block for one queued item, then gather more for the batch window."""
+        items = [self._queue.get()]
+        if not self.batch_supported:
+            return items
+
+        deadline = time.monotonic() + self.batch_window
+        while items[-1][0] is not None and len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._take_batch()
+            stop = items[-1][0] is None
+            if stop:
+                items.pop()
+
+            results = self._deliver([item[:3] for item in items])
+            now = time.monotonic()
+            for item, result in zip(items, results):
+                self._report(result, now - item[3])
+            if stop:
+                break
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Backoff before the next try of an event that has failed ``attempts`` times before."""
+        return min(self.RETRY_MIN * 2 ** min(attempts, 16), self.RETRY_MAX)
+
+    def _flush_outbox(self):
+        while not self._closing.is_set():
+            self._wakeup.clear()
+            events = self.outbox.peek(self.FLUSH_LIMIT)
+            if not events:
+                # Sleep until a new event is submitted or a failed one is due again
+                due = self.outbox.next_due()
+                self._wakeup.wait(None if due is None else max(due - time.time(), 0.0))
+                continue
+
+            if self.batch_supported and len(events) < self.batch_size:
+                # Give the window a chance to fill before sending
+                remaining = events[0].created + self.batch_window - time.time()
+                if remaining > 0 and not self._closing.wait(remaining):
+                    events = self.outbox.peek(self.FLUSH_LIMIT)
+
+            results = self._deliver([(e.url, e.position, e.uid) for e in events])
+            self.outbox.remove(e.id for e, r in zip(events, results) if r.delivered)
+
+            now = time.time()
+            reachable = any(r.delivered for r in results)
+            if reachable:
+                # The server is taking events again: stop the backlog waiting out its backoff
+                self.outbox.retry_now()
+            retries = []
+            dead = []
+            for event, result in zip(events, results):
+                if result.delivered:
+                    continue
+                if reachable and event.failures + 1 >= self.MAX_ATTEMPTS:
+                    dead.append((event.id, result.error or f"HTTP {result.status_code}"))
+                else:
+                    retries.append((event.id, now + self._retry_delay(event.attempts)))
+            self.outbox.record_attempt(retries, failed=reachable)
+            if dead:
+                self.outbox.dead_letter(dead)
+                METRICS.inc('api_dead_letter', len(dead))
+
+            for event, result in zip(events, results):
+                self._report(result, now - event.created)
@@ -0,0 +1,269 @@
+"""Local scan history: where and when each tag was seen, answerable without the server.
+
+Examples:
+    python rfid_history.py last E2801160A10106A43398E509
+    python rfid_history.py positions --hours 24
+    python rfid_history.py hourly --position 3 --hours 12
+"""
+import argparse
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from rfid_protocol import RFIDReaderConfig
+
+HOUR = 3600
+
+
+class Sighting(NamedTuple):
+    """One scan of a tag."""
+    uid: str
+    position: str
+    timestamp: float
+
+
+class HourlyCount(NamedTuple):
+    hour: float  # start of the hour, seconds since the epoch
+    position: str
+    count: int
+
+
+class ScanHistory:
+    """Every scan in SQLite (WAL mode), indexed by UID, position and time.
+
+    :meth:`add` only queues the scan; a writer thread drains the queue and
+    inserts everything that is waiting in one transaction, so the scan
+    thread never waits on the disk and a burst of tags costs one commit.
+    Per-hour counts are kept in a rollup table in the same transaction,
+    which keeps :meth:`counts_per_position` and :meth:`counts_per_hour`
+    to a few hundred rows even over a year of scans.
+
+    Queries use their own connection, so they never wait for a write.
+    ``readonly=True`` opens an existing database for queries only.
+    """
+
+    def __init__(self, path: str = RFIDReaderConfig.HISTORY_PATH, batch_size: int = 500, batch_window: float = 0.5,
+                 readonly: bool = False):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.readonly = readonly
+        self.written = 0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        if readonly:
+            # Queries only; a missing database is an error rather than a new empty one
+            self._writer = None
+            self._reader = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            return
+
+        self._writer = self._connect()
+        self._writer.executescript(
+            "CREATE TABLE IF NOT EXISTS scans ("
+            " id INTEGER PRIMARY KEY,"
+            " uid TEXT NOT NULL,"
+            " position TEXT NOT NULL,"
+            " ts REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS scans_uid_ts ON scans (uid, ts);"
+            "CREATE INDEX IF NOT EXISTS scans_position_ts ON scans (position, ts);"
+            "CREATE INDEX IF NOT EXISTS scans_ts ON scans (ts);"
+            "CREATE TABLE IF NOT EXISTS hourly ("
+            " hour INTEGER NOT NULL,"
+            " position TEXT NOT NULL,"
+            " count INTEGER NOT NULL,"
+            " PRIMARY KEY (hour, position)) WITHOUT ROWID;"
+        )
+        self._reader = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self):
+        """Start the writer thread; does nothing if already running."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="rfid-history", daemon=True)
+        self._thread.start()
+
+    def add(self, position: str, uid: str, timestamp: Optional[float] = None):
+        """Queue a scan for the writer thread."""
+        self._queue.put(Sighting(uid, position, time.time() if timestamp is None else timestamp))
+
+    def flush(self):
+        """Write whatever is queued now, on the calling thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._write(batch)
+
+    def close(self, timeout: float = 2.0):
+        """Write what is still queued, then stop the writer and close the database."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+        with self._lock:
+            self._reader.close()
+
+    def last_seen(self, uid: str) -> Optional[Sighting]:
+        """The most recent scan of ``uid``, or None if it was never seen."""
+        row = self._query(
+            "SELECT uid, position, ts FROM scans WHERE uid = ? ORDER BY ts DESC LIMIT 1", (uid,)
+        )
+        return Sighting(*row[0]) if row else None
+
+    def sightings(self, uid: str, limit: int = 20) -> List[Sighting]:
+        """The latest scans of ``uid``, newest first."""
+        rows = self._query(
+            "SELECT uid, position, ts FROM scans WHERE uid = ? ORDER BY ts DESC LIMIT ?", (uid, limit)
+        )
+        return [Sighting(*row) for row in rows]
+
+    def at_position(self, position: str, since: float = 0.0, limit: int = 100) -> List[Sighting]:
+        """The latest scans at ``position`` since a time, newest first."""
+        rows = self._query(
+            "SELECT uid, position, ts FROM scans WHERE position = ? AND ts >= ? ORDER BY ts DESC LIMIT ?",
+            (position, since, limit)
+        )
+        return [Sighting(*row) for row in rows]
+
+    def counts_per_position(self, since: float = 0.0, until: float = float('inf')) -> List[Tuple[str, int]]:
+        """(position, scans) from the hour containing ``since`` up to the one containing ``until``."""
+        return self._query(
+            "SELECT position, SUM(count) FROM hourly WHERE hour >= ? AND hour < ? GROUP BY position ORDER BY position",
+            self._hour_range(since, until)
+        )
+
+    def counts_per_hour(self, since: float = 0.0, until: float = float('inf'),
+                        position: Optional[str] = None) -> List[HourlyCount]:
+        """Scans per hour and position, oldest hour first."""
+        sql = "SELECT hour, position, count FROM hourly WHERE hour >= ? AND hour < ?"
+        params = self._hour_range(since, until)
+        if position is not None:
+            sql += " AND position = ?"
+            params += (position,)
+        rows = self._query(sql + " ORDER BY hour, position", params)
+        return [HourlyCount(hour * HOUR, position, count) for hour, position, count in rows]
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM scans", ())[0][0]
+
+    @staticmethod
+    def _hour_range(since: float, until: float) -> Tuple[int, int]:
+        last = int(until // HOUR) if until != float('inf') else sys.maxsize
+        return int(since // HOUR), last
+
+    def _query(self, sql: str, params: tuple) -> list:
+        with self._lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                print(f"History write failed, {len(batch)} scans lost: {e}", file=sys.stderr)
+
+    def _write(self, batch: List[Sighting]):
+        if not batch:
+            return
+        hourly = {}
+        for scan in batch:
+            key = (int(scan.timestamp // HOUR), scan.position)
+            hourly[key] = hourly.get(key, 0) + 1
+
+        self._writer.execute("BEGIN")
+        try:
+            self._writer.executemany("INSERT INTO scans (uid, position, ts) VALUES (?, ?, ?)", batch)
+            self._writer.executemany(
+                "INSERT INTO hourly (hour, position, count) VALUES (?, ?, ?)"
+                " ON CONFLICT (hour, position) DO UPDATE SET count = count + excluded.count",
+                [(hour, position, count) for (hour, position), count in hourly.items()]
+            )
+        except Exception:
+            self._writer.execute("ROLLBACK")
+            raise
+        self._writer.execute("COMMIT")
+        self.written += len(batch)
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def _query(history: ScanHistory, args) -> List[str]:
+    """Output lines for the chosen subcommand."""
+    if args.command == 'last':
+        rows = [f"{_format_time(s.timestamp)}  position {s.position}"
+                for s in history.sightings(args.uid.upper(), args.all)]
+        rows = rows or [f"{args.uid} was never seen"]
+    else:
+        since = time.time() - args.hours * HOUR
+        if args.command == 'positions':
+            rows = [f"position {position}: {count}" for position, count in history.counts_per_position(since)]
+        else:
+            rows = [f"{_format_time(c.hour)}  position {c.position}: {c.count}"
+                    for c in history.counts_per_hour(since, position=args.position)]
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the local scan history')
+    parser.add_argument('--db', default=RFIDReaderConfig.HISTORY_PATH, help='History database')
+    commands = parser.add_subparsers(dest='command', required=True)
+    last = commands.add_parser('last', help='Where and when a tag was last seen')
+    last.add_argument('uid')
+    last.add_argument('--all', type=int, default=1, metavar='N', help='Show the latest N sightings')
+    positions = commands.add_parser('positions', help='Scans per position')
+    positions.add_argument('--hours', type=float, default=24, help='Look back this many hours')
+    hourly = commands.add_parser('hourly', help='Scans per hour')
+    hourly.add_argument('--hours', type=float, default=24, help='Look back this many hours')
+    hourly.add_argument('--position')
+    args = parser.parse_args()
+
+    try:
+        history = ScanHistory(args.db, readonly=True)
+        started = time.perf_counter()
+        rows = _query(history, args)
+    except sqlite3.Error as e:
+        print(f"Can't read history database {args.db}: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+    print("\n".join(rows))
+    print(f"({elapsed * 1000:.1f} ms)", file=sys.stderr)
+    history.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
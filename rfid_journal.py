@@ -0,0 +1,282 @@
+"""Append-only binary scan journal with size-based rotation and an mmap reader.
+
+Every record has the same width, so the file is a header followed by a
+packed array: appending is one ``write`` and reading back is a single
+``struct.iter_unpack`` over a memory map, with no parsing or line splitting.
+
+Run it to summarise a journal at the end of a shift:
+    python rfid_journal.py rfid_journal.rfj
+"""
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import Counter
+from itertools import compress
+from operator import itemgetter
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+MAGIC = b'RFJ1'
+HEADER = struct.Struct('<4sHH8x')  # magic, version, record size
+VERSION = 1
+# timestamp, position, status, UID length, UID bytes (padded to 56 bytes)
+RECORD = struct.Struct('<d8sBB6x32s')
+# Views of the same records for one-field scans; a single bytes/float per
+# record is much cheaper to hash and compare than the full tuple
+TIMESTAMP = struct.Struct('<d48x')
+KEY = struct.Struct('<8x48s')  # everything but the timestamp
+
+POSITION_SIZE = 8
+UID_SIZE = 32
+
+STATUS_NEW = 0
+STATUS_DUPLICATE = 1
+STATUS_NAMES = {STATUS_NEW: 'new', STATUS_DUPLICATE: 'duplicate'}
+
+
+class JournalRecord(NamedTuple):
+    timestamp: float
+    position: str
+    uid: str
+    status: int
+
+
+def pack_record(timestamp: float, position: str, uid: str, status: int = STATUS_NEW) -> bytes:
+    """One fixed-width record; raises ValueError if a field doesn't fit."""
+    position_bytes = position.encode('ascii')
+    uid_bytes = bytes.fromhex(uid)
+    if len(position_bytes) > POSITION_SIZE:
+        raise ValueError(f"position {position!r} is longer than {POSITION_SIZE} bytes")
+    if len(uid_bytes) > UID_SIZE:
+        raise ValueError(f"UID {uid} is longer than {UID_SIZE} bytes")
+    return RECORD.pack(timestamp, position_bytes, status, len(uid_bytes), uid_bytes)
+
+
+def unpack_record(raw: Tuple[float, bytes, int, int, bytes]) -> JournalRecord:
+    """Turn an unpacked :data:`RECORD` tuple back into strings."""
+    timestamp, position, status, uid_len, uid = raw
+    return JournalRecord(timestamp, position.rstrip(b'\0').decode('ascii'), uid[:uid_len].hex().upper(), status)
+
+
+def journal_files(path: str) -> List[str]:
+    """The journal and its rotated backups that exist, oldest first."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    files = backups[::-1]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+class ScanJournal:
+    """Writer for the journal at ``path``.
+
+    Once the file would grow past ``max_bytes`` it is renamed to
+    ``path.1`` (older backups shift up, like ``logging``'s rotating
+    handler) and a fresh file is started; at most ``backups`` old files are
+    kept. Records are written unbuffered, so a crash loses at most the
+    record being written, and a torn record at the end is cut off when the
+    journal is reopened.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 16 * 1024 * 1024, backups: int = 10):
+        self.path = path
+        self.max_bytes = max(max_bytes, HEADER.size + RECORD.size)
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._open()
+
+    def append(self, position: str, uid: str, status: int = STATUS_NEW,
+               timestamp: Optional[float] = None):
+        record = pack_record(time.time() if timestamp is None else timestamp, position, uid, status)
+        with self._lock:
+            if self._size + RECORD.size > self.max_bytes:
+                self._rotate()
+            self._file.write(record)
+            self._size += RECORD.size
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _open(self):
+        self._file = open(self.path, 'a+b', buffering=0)
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            size = HEADER.size
+        else:
+            self._file.seek(0)
+            _check_header(self._file.read(HEADER.size), self.path)
+            whole = size - (size - HEADER.size) % RECORD.size
+            if whole != size:
+                self._file.truncate(whole)
+                size = whole
+            self._file.seek(0, os.SEEK_END)
+        self._size = size
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+
+def _check_header(header: bytes, path: str):
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a scan journal (short header)")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} scan journal")
+
+
+class JournalReader:
+    """Read-only memory-mapped view of one journal file.
+
+    :meth:`raw`, :meth:`timestamps` and :meth:`keys` unpack straight from
+    the map and are the fast paths for counting; :meth:`__iter__` decodes
+    each record into a :class:`JournalRecord`. A record still being written
+    at the end is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            _check_header(f.read(HEADER.size), path)
+            size = os.fstat(f.fileno()).st_size
+            self.count = (size - HEADER.size) // RECORD.size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def raw(self) -> Iterator[Tuple[float, bytes, int, int, bytes]]:
+        return self._unpack(RECORD)
+
+    def timestamps(self) -> Iterator[float]:
+        return map(itemgetter(0), self._unpack(TIMESTAMP))
+
+    def keys(self) -> Iterator[bytes]:
+        """Position, status and UID of each record as one bytes value."""
+        return map(itemgetter(0), self._unpack(KEY))
+
+    def _unpack(self, layout: struct.Struct):
+        if not self.count:
+            return iter(())
+        end = HEADER.size + self.count * RECORD.size
+        return layout.iter_unpack(memoryview(self._map)[HEADER.size:end])
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        return map(unpack_record, self.raw())
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # An unfinished iterator still points into the map; it is
+                # unmapped once that iterator is gone
+                pass
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_journal(path: str) -> Iterator[JournalRecord]:
+    """Every record in the journal and its backups, oldest first."""
+    for name in journal_files(path):
+        with JournalReader(name) as reader:
+            yield from reader
+
+
+class JournalSummary(NamedTuple):
+    records: int
+    first: Optional[float]
+    last: Optional[float]
+    per_position: Dict[str, int]  # new scans per position
+    unique_uids: int
+    duplicates: int
+
+
+def summarize(path: str, since: float = 0.0, until: float = float('inf')) -> JournalSummary:
+    """Reconciliation totals over the journal and its backups.
+
+    Counts whole record keys straight off the memory map and decodes only
+    the distinct ones, so the cost per record is one hash of a bytes value.
+    """
+    keys = Counter()
+    first = last = None
+    for name in journal_files(path):
+        with JournalReader(name) as reader:
+            timestamps = list(reader.timestamps())
+            if since > 0 or until != float('inf'):
+                selected = [since <= timestamp < until for timestamp in timestamps]
+                keys.update(compress(reader.keys(), selected))
+                timestamps = list(compress(timestamps, selected))
+            else:
+                keys.update(reader.keys())
+            if timestamps:
+                first = min(timestamps) if first is None else min(first, min(timestamps))
+                last = max(timestamps) if last is None else max(last, max(timestamps))
+
+    per_position = Counter()
+    uids = set()
+    duplicates = 0
+    for key, count in keys.items():
+        record = unpack_record((0.0, *RECORD.unpack(bytes(8) + key)[1:]))
+        if record.status == STATUS_DUPLICATE:
+            duplicates += count
+        else:
+            per_position[record.position] += count
+            uids.add(record.uid)
+    return JournalSummary(
+        sum(keys.values()), first, last, dict(sorted(per_position.items())), len(uids), duplicates
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarise or dump a binary scan journal')
+    parser.add_argument('path', help='Journal file; rotated backups (path.1, path.2, ...) are included')
+    parser.add_argument('--dump', action='store_true', help='Print every record as tab-separated text')
+    args = parser.parse_args()
+
+    if args.dump:
+        for record in read_journal(args.path):
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.timestamp))
+            print(f"{stamp}\t{record.position}\t{record.uid}\t{STATUS_NAMES.get(record.status, record.status)}")
+        return
+
+    started = time.perf_counter()
+    summary = summarize(args.path)
+    elapsed = time.perf_counter() - started
+    print(f"{summary.records} records in {elapsed:.3f} s "
+          f"({summary.records / elapsed if elapsed else 0:,.0f} records/s)")
+    if summary.records:
+        print(f"From {time.ctime(summary.first)} to {time.ctime(summary.last)}")
+    print(f"{summary.unique_uids} unique tags, {summary.duplicates} duplicates")
+    for position, count in summary.per_position.items():
+        print(f"  position {position}: {count} scans")
+
+
+if __name__ == '__main__':
+    main()
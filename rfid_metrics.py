@@ -0,0 +1,174 @@
+"""Per-stage latency histograms and counters, served in Prometheus text format.
+
+Components record into the shared :data:`METRICS` registry. It starts
+disabled, in which case ``observe``/``inc`` return straight away; calling
+:func:`serve_metrics` (or setting ``METRICS.enabled``) turns it on.
+
+Stages: ``serial`` (command write to reply read), ``decode``, ``dedup``,
+``ui`` (one UI frame), ``api_request`` (the HTTP call) and ``tag_to_api``
+(from handing a tag to the dispatcher until the API answered).
+"""
+import bisect
+import threading
+from typing import Dict, List, Tuple
+
+# Bucket upper bounds in seconds, 10 us to 30 s
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with bucket-interpolated quantiles."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += seconds
+            self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile by interpolating inside its bucket."""
+        with self._lock:
+            counts = list(self.counts)
+            count = self.count
+        if not count:
+            return 0.0
+
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class Metrics:
+    """Registry of per-stage histograms and labelled counters."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """Record how long ``stage`` took."""
+        if not self.enabled:
+            return
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Add to a counter, e.g. ``inc('api_results', result='ok')``."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def histogram(self, stage: str) -> Histogram:
+        with self._lock:
+            return self._histograms.setdefault(stage, Histogram())
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        if histograms:
+            lines.append("# HELP rfid_stage_seconds Time spent in each scan pipeline stage.")
+            lines.append("# TYPE rfid_stage_seconds histogram")
+            for stage, histogram in histograms:
+                counts, total, count = histogram.snapshot()
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'rfid_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'rfid_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+                lines.append(f'rfid_stage_seconds_sum{{stage="{stage}"}} {total}')
+                lines.append(f'rfid_stage_seconds_count{{stage="{stage}"}} {count}')
+
+            lines.append("# HELP rfid_stage_seconds_quantile Estimated stage latency quantiles.")
+            lines.append("# TYPE rfid_stage_seconds_quantile gauge")
+            for stage, histogram in histograms:
+                for q in QUANTILES:
+                    lines.append(
+                        f'rfid_stage_seconds_quantile{{stage="{stage}",quantile="{q}"}} {histogram.quantile(q)}'
+                    )
+
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"rfid_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", metrics: Metrics = METRICS):
+    """Enable ``metrics`` and serve it on ``http://host:port/metrics``.
+
+    Returns the ``ThreadingHTTPServer``; ``http.server`` is imported here so
+    apps that never serve metrics don't pay for it at startup.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            payload = self.server.metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    metrics.enabled = True
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, name="rfid-metrics", daemon=True).start()
+    return server
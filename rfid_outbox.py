@@ -0,0 +1,167 @@
+"""Durable store-and-forward queue for API events."""
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+
+class OutboxEvent(NamedTuple):
+    """One scan waiting to be delivered to the API."""
+    id: int
+    url: str
+    position: str
+    uid: str
+    created: float
+    attempts: int
+    failures: int  # failed attempts in rounds where other events got through
+
+
+class DeadLetter(NamedTuple):
+    """An event given up on, with the last reason it failed."""
+    id: int
+    url: str
+    position: str
+    uid: str
+    created: float
+    attempts: int
+    failed: float
+    reason: str
+
+
+class Outbox:
+    """FIFO of API events kept in SQLite (WAL mode) so they survive restarts.
+
+    Every scan is written here first and only removed once the server has
+    accepted it, so a network outage delays events instead of losing them.
+    A failed event is not offered again until its ``next_attempt`` time,
+    or until :meth:`retry_now` clears every wait; one the sender gives up on
+    is moved to the ``dead_letter`` table.
+    The connection is shared between the scan and flusher threads behind a
+    lock; WAL with ``synchronous=NORMAL`` keeps inserts off the fsync path.
+    """
+
+    def __init__(self, path: str = "rfid_outbox.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " url TEXT NOT NULL,"
+            " position TEXT NOT NULL,"
+            " uid TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0);"
+            "CREATE TABLE IF NOT EXISTS dead_letter ("
+            " id INTEGER PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " position TEXT NOT NULL,"
+            " uid TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " attempts INTEGER NOT NULL,"
+            " failed REAL NOT NULL,"
+            " reason TEXT NOT NULL);"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+        if 'next_attempt' not in columns:
+            # Outboxes written before per-event retry times
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN next_attempt REAL NOT NULL DEFAULT 0")
+        if 'failures' not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN failures INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS outbox_next_attempt ON outbox (next_attempt)")
+
+    def add(self, url: str, position: str, uid: str) -> int:
+        """Append an event and return its id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (url, position, uid, created) VALUES (?, ?, ?, ?)",
+                (url, position, uid, time.time())
+            )
+            return cursor.lastrowid
+
+    def peek(self, limit: int = 200, now: Optional[float] = None) -> List[OutboxEvent]:
+        """Oldest events that are due for a delivery attempt, in the order they were added."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, position, uid, created, attempts, failures FROM outbox"
+                " WHERE next_attempt <= ? ORDER BY id LIMIT ?",
+                (now, limit)
+            ).fetchall()
+        return [OutboxEvent(*row) for row in rows]
+
+    def next_due(self) -> Optional[float]:
+        """When the earliest waiting event may be tried again, or None if the outbox is empty."""
+        with self._lock:
+            return self._conn.execute("SELECT MIN(next_attempt) FROM outbox").fetchone()[0]
+
+    def remove(self, ids: Iterable[int]):
+        """Drop delivered events."""
+        self._executemany("DELETE FROM outbox WHERE id = ?", [(event_id,) for event_id in ids])
+
+    def record_attempt(self, retries: Iterable[Tuple[int, float]], failed: bool = True):
+        """Count a failed delivery against each (id, next_attempt) and hold the event back until then.
+
+        ``failed=False`` counts the attempt for backoff only, not in ``failures``.
+        """
+        self._executemany(
+            "UPDATE outbox SET attempts = attempts + 1, failures = failures + ?, next_attempt = ? WHERE id = ?",
+            [(int(failed), next_attempt, event_id) for event_id, next_attempt in retries]
+        )
+
+    def retry_now(self):
+        """Make every waiting event due again, e.g. once the server is answering."""
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET next_attempt = 0 WHERE next_attempt > 0")
+
+    def dead_letter(self, failures: Iterable[Tuple[int, str]]):
+        """Give up on each (id, reason): move the event to the dead letter table."""
+        failed = time.time()
+        params = [(failed, reason, event_id) for event_id, reason in failures]
+        if not params:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO dead_letter (id, url, position, uid, created, attempts, failed, reason)"
+                    " SELECT id, url, position, uid, created, attempts, ?, ? FROM outbox WHERE id = ?",
+                    params
+                )
+                self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(event_id,) for _, _, event_id in params])
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def dead_letters(self, limit: int = 100) -> List[DeadLetter]:
+        """Events given up on, most recent first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, position, uid, created, attempts, failed, reason FROM dead_letter"
+                " ORDER BY failed DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [DeadLetter(*row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _executemany(self, sql: str, params: List[tuple]):
+        if not params:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, params)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
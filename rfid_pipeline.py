@@ -0,0 +1,286 @@
+"""Fan-out of scanned tags to independent sinks: API, local log, UI, stdout.
+
+The reader side (serial source -> frame decode -> dedup) is
+:class:`~rfid_reader.ScanSession`; its ``on_tag`` is
+:meth:`ScanPipeline.publish`, which hands every new tag to each sink's own
+bounded queue. A slow sink therefore only ever fills its own queue, and its
+``policy`` decides what happens then:
+
+* ``block`` - wait up to ``block_timeout`` for room (bounded backpressure
+  on the reader thread), then drop the tag
+* ``drop_newest`` - drop the incoming tag
+* ``drop_oldest`` - drop the oldest queued tag to make room, for sinks like
+  the UI where only the latest tag matters
+"""
+import abc
+import json
+import queue
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, NamedTuple, Optional, TextIO, Tuple
+
+from rfid_cache import DedupCache
+from rfid_metrics import METRICS
+
+if TYPE_CHECKING:
+    # Annotations only; the apps that use these sinks import them anyway
+    from rfid_history import ScanHistory
+    from rfid_journal import ScanJournal
+
+BLOCK = 'block'
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+
+class ScanEvent(NamedTuple):
+    """One newly seen tag."""
+    position: str
+    uid: str
+    timestamp: float  # time.time() when it was read
+
+
+class DuplicateEvent(ScanEvent):
+    """A repeat read the dedup cache dropped; only :class:`JournalSink` queues these."""
+    __slots__ = ()
+
+
+class Sink(abc.ABC):
+    """A consumer with its own thread and bounded queue; subclasses implement :meth:`handle`.
+
+    ``on_drop(event)`` is called (on the publishing thread) for every event
+    the queue policy throws away, and by subclasses that reject one.
+    """
+    name = 'sink'
+
+    def __init__(self, queue_size: int = 1024, policy: str = DROP_NEWEST,
+                 block_timeout: float = 0.05,
+                 on_drop: Optional[Callable[[ScanEvent], None]] = None,
+                 name: Optional[str] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown queue policy {policy!r}")
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.on_drop = on_drop
+        if name:
+            self.name = name
+
+        self.handled = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+
+    def start(self):
+        """Start the sink thread; does nothing if already running."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"rfid-sink-{self.name}", daemon=True)
+        self._thread.start()
+
+    def put(self, event: ScanEvent) -> bool:
+        """Queue an event according to the policy; False if it was dropped."""
+        try:
+            if self.policy == BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == DROP_OLDEST:
+            try:
+                self._dropped(self._queue.get_nowait())
+                self._queue.put_nowait(event)
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+        self._dropped(event)
+        return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 1.0):
+        """Finish the queued events, then stop the thread and close the sink."""
+        if self._thread is not None:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+            self._thread = None
+        self.close()
+
+    @abc.abstractmethod
+    def handle(self, event: ScanEvent):
+        """Deliver one event; runs on the sink thread."""
+
+    def close(self):
+        """Release whatever the sink holds open."""
+
+    def _dropped(self, event: ScanEvent):
+        self.dropped += 1
+        METRICS.inc('sink_dropped', sink=self.name)
+        if self.on_drop:
+            self.on_drop(event)
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                break
+            try:
+                self.handle(event)
+                self.handled += 1
+            except Exception as e:
+                self.errors += 1
+                METRICS.inc('sink_errors', sink=self.name)
+                print(f"{self.name} sink error: {e}", file=sys.stderr)
+
+
+class CallbackSink(Sink):
+    """Call ``func(event)`` for every tag, e.g. to update the UI."""
+    name = 'callback'
+
+    def __init__(self, func: Callable[[ScanEvent], None], **kwargs):
+        super().__init__(**kwargs)
+        self.func = func
+
+    def handle(self, event: ScanEvent):
+        self.func(event)
+
+
+class HttpSink(Sink):
+    """Report tags to the registration API through an :class:`~rfid_dispatch.ApiDispatcher`.
+
+    ``settings`` may return ``(enabled, url)`` per tag, for apps where the
+    API can be switched off or pointed elsewhere at runtime.
+    """
+    name = 'http'
+
+    def __init__(self, dispatcher, settings: Optional[Callable[[], Tuple[bool, str]]] = None,
+                 policy: str = BLOCK, **kwargs):
+        super().__init__(policy=policy, **kwargs)
+        self.dispatcher = dispatcher
+        self.settings = settings
+
+    def handle(self, event: ScanEvent):
+        url = None
+        if self.settings is not None:
+            enabled, url = self.settings()
+            if not enabled:
+                return
+        if not self.dispatcher.submit(event.position, event.uid, url=url):
+            self._dropped(event)
+
+
+class LogSink(Sink):
+    """Append ``timestamp<TAB>position<TAB>uid`` lines to a local file."""
+    name = 'log'
+
+    def __init__(self, path: str, policy: str = BLOCK, **kwargs):
+        super().__init__(policy=policy, **kwargs)
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def handle(self, event: ScanEvent):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(event.timestamp))
+        self._file.write(f"{stamp}\t{event.position}\t{event.uid}\n")
+
+    def close(self):
+        self._file.close()
+
+
+class JournalSink(Sink):
+    """Append every tag to a binary :class:`~rfid_journal.ScanJournal`.
+
+    :meth:`put_duplicate` records repeat reads as well, at most one per
+    (position, uid) every ``duplicate_window`` seconds, so a tag left on
+    the antenna doesn't fill the journal with a record per poll.
+    """
+    name = 'journal'
+
+    def __init__(self, journal: 'ScanJournal', policy: str = BLOCK,
+                 duplicate_window: float = 60.0, **kwargs):
+        super().__init__(policy=policy, **kwargs)
+        self.journal = journal
+        self._duplicates = DedupCache(duplicate_window)
+
+    def put_duplicate(self, position: str, uid: str) -> bool:
+        """Queue a repeat read unless one was already queued within the window."""
+        if self._duplicates.seen(position, uid):
+            return False
+        return self.put(DuplicateEvent(position, uid, time.time()))
+
+    def handle(self, event: ScanEvent):
+        if isinstance(event, DuplicateEvent):
+            from rfid_journal import STATUS_DUPLICATE
+            self.journal.append(event.position, event.uid, STATUS_DUPLICATE, event.timestamp)
+        else:
+            self.journal.append(event.position, event.uid, timestamp=event.timestamp)
+
+    def close(self):
+        self.journal.close()
+
+
+class HistorySink(Sink):
+    """Record every tag in the local :class:`~rfid_history.ScanHistory`."""
+    name = 'history'
+
+    def __init__(self, history: 'ScanHistory', policy: str = BLOCK, **kwargs):
+        super().__init__(policy=policy, **kwargs)
+        self.history = history
+
+    def handle(self, event: ScanEvent):
+        self.history.add(event.position, event.uid, event.timestamp)
+
+    def close(self):
+        self.history.close()
+
+
+class JsonlSink(Sink):
+    """Write one JSON object per tag, ``{"ts", "pos", "kode"}``, to a stream (stdout by default)."""
+    name = 'jsonl'
+
+    def __init__(self, stream: Optional[TextIO] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.stream = stream or sys.stdout
+
+    def handle(self, event: ScanEvent):
+        self.stream.write(json.dumps({'ts': event.timestamp, 'pos': event.position, 'kode': event.uid}) + '\n')
+        self.stream.flush()
+
+
+class ScanPipeline:
+    """Publish each new tag to every sink; use :meth:`publish` as ``on_tag``."""
+
+    def __init__(self, sinks: Iterable[Sink] = ()):
+        self.sinks: List[Sink] = list(sinks)
+        self.published = 0
+
+    def add(self, sink: Sink) -> Sink:
+        self.sinks.append(sink)
+        return sink
+
+    def start(self):
+        for sink in self.sinks:
+            sink.start()
+
+    def stop(self, timeout: float = 1.0):
+        for sink in self.sinks:
+            sink.stop(timeout)
+
+    def publish(self, position: str, uid: str):
+        """Fan a tag out to all sinks; never waits longer than a blocking sink's timeout."""
+        event = ScanEvent(position, uid, time.time())
+        self.published += 1
+        for sink in self.sinks:
+            sink.put(event)
+
+    def stats(self) -> Dict[str, Tuple[int, int, int]]:
+        """(handled, dropped, pending) per sink name."""
+        return {sink.name: (sink.handled, sink.dropped, sink.pending()) for sink in self.sinks}
@@ -0,0 +1,133 @@
+"""Several readers in one process, feeding one dedup/dispatch pipeline."""
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from rfid_protocol import RFIDReaderConfig
+from rfid_reader import ScanSession
+from rfid_serial import Reconnector, open_reader
+
+
+class ReaderStats(NamedTuple):
+    """Counters for one reader, with rates since the previous snapshot."""
+    port: str
+    position: str
+    polls: int
+    tags: int
+    duplicates: int
+    empty_reads: int
+    polls_per_second: float
+    tags_per_second: float
+    read_ms: float  # mean command/reply exchange time
+    reconnects: int
+    downtime: float  # seconds spent reconnecting
+
+
+class ReaderPool:
+    """Drive N serial readers concurrently, each bound to its own position.
+
+    Every reader gets a :class:`~rfid_reader.ScanSession` (one light thread
+    blocked on its port) while the dedup cache and ``on_tag`` consumer are
+    shared, so adding a gate costs a thread and a port handle rather than
+    another process with its own Tk interpreter and HTTP pool.
+    """
+
+    def __init__(self, on_tag: Callable[[str, str], None], dedup=None,
+                 period: float = RFIDReaderConfig.SCAN_PERIOD,
+                 baud: int = RFIDReaderConfig.BAUD_RATE,
+                 on_error: Optional[Callable[[str, Exception], None]] = None,
+                 mode: str = RFIDReaderConfig.SCAN_MODE,
+                 target_baud: int = RFIDReaderConfig.TARGET_BAUD,
+                 on_state: Optional[Callable[[str, Reconnector], None]] = None):
+        self.on_tag = on_tag
+        self.dedup = dedup
+        self.period = period
+        self.baud = baud
+        self.target_baud = target_baud
+        self.on_state = on_state
+        self.mode = mode
+        self.on_error = on_error
+
+        self.sessions: Dict[str, ScanSession] = {}
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, tuple] = {}
+
+    def add(self, port: str, position: str, connection=None,
+            reopen: Optional[Callable[[], object]] = None) -> ScanSession:
+        """Register a reader; opens ``port`` unless a connection is given.
+
+        Ports the pool opens itself are reopened at the same rate after the
+        reader drops out; pass ``reopen`` to get that for a given connection.
+        """
+        if connection is None:
+            connection = open_reader(port, self.baud, self.target_baud)
+            baud = connection.baudrate
+            reopen = reopen or (lambda: open_reader(port, baud))
+
+        session = ScanSession(
+            connection,
+            position,
+            self.on_tag,
+            dedup=self.dedup,
+            period=self.period,
+            mode=self.mode,
+            on_error=lambda e: self._on_error(port, e),
+            reopen=reopen,
+            on_state=lambda reconnector: self._on_state(port, reconnector)
+        )
+        with self._lock:
+            self.sessions[port] = session
+            self._snapshots[port] = (time.monotonic(), 0, 0, 0, 0.0)
+        return session
+
+    def remove(self, port: str):
+        """Stop a reader and close its port."""
+        with self._lock:
+            session = self.sessions.pop(port, None)
+            self._snapshots.pop(port, None)
+        if session:
+            session.stop()
+            session.worker.join(1.0)
+            session.connection.close()
+
+    def start(self):
+        for session in list(self.sessions.values()):
+            session.start()
+
+    def stop(self):
+        sessions = list(self.sessions.values())
+        for session in sessions:
+            session.stop()
+        for session in sessions:
+            session.worker.join(1.0)
+            session.connection.close()
+
+    def stats(self) -> List[ReaderStats]:
+        """Per-reader counters and throughput since the last call."""
+        now = time.monotonic()
+        result = []
+        with self._lock:
+            for port, session in self.sessions.items():
+                since, polls, tags, reads, read_time = self._snapshots[port]
+                elapsed = max(now - since, 1e-9)
+                transport = session.transport
+                new_reads = transport.reads - reads
+                result.append(ReaderStats(
+                    port, session.position,
+                    session.polls, session.tags, session.duplicates, session.empty_reads,
+                    (session.polls - polls) / elapsed,
+                    (session.tags - tags) / elapsed,
+                    (transport.total_elapsed - read_time) / new_reads * 1000 if new_reads else 0.0,
+                    session.reconnector.reconnects if session.reconnector else 0,
+                    session.reconnector.downtime if session.reconnector else 0.0,
+                ))
+                self._snapshots[port] = (now, session.polls, session.tags, transport.reads, transport.total_elapsed)
+        return result
+
+    def _on_error(self, port: str, e: Exception):
+        if self.on_error:
+            self.on_error(port, e)
+
+    def _on_state(self, port: str, reconnector: Reconnector):
+        if self.on_state:
+            self.on_state(port, reconnector)
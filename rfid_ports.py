@@ -0,0 +1,106 @@
+"""Background watch for reader serial ports being plugged in or pulled out."""
+import sys
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from rfid_protocol import RFIDReaderConfig
+from rfid_reader import ReaderWorker
+
+PORT_ADDED = 'added'
+PORT_REMOVED = 'removed'
+
+
+class PortInfo(NamedTuple):
+    """The parts of a ``comports()`` entry we match and report on."""
+    device: str
+    vid: Optional[int]
+    pid: Optional[int]
+    serial_number: Optional[str]
+    description: str
+
+
+class PortEvent(NamedTuple):
+    kind: str  # PORT_ADDED or PORT_REMOVED
+    port: PortInfo
+
+
+class PortMatcher:
+    """Decide whether a port is a reader.
+
+    USB VID/PID and serial number are stable across driver versions and
+    languages; the description substring is only a fallback for ports that
+    report no USB details.
+    """
+
+    def __init__(self, usb_ids: Iterable[Tuple[int, int]] = RFIDReaderConfig.READER_USB_IDS,
+                 serial_numbers: Iterable[str] = RFIDReaderConfig.READER_SERIAL_NUMBERS,
+                 description: Optional[str] = "CH340"):
+        self.usb_ids = frozenset(usb_ids)
+        self.serial_numbers = frozenset(serial_numbers)
+        self.description = description
+
+    def __call__(self, port: PortInfo) -> bool:
+        if self.serial_numbers and port.serial_number in self.serial_numbers:
+            return True
+        if port.vid is not None:
+            return (port.vid, port.pid) in self.usb_ids
+        return bool(self.description) and self.description in port.description
+
+
+def list_reader_ports(matcher: Optional[Callable[[PortInfo], bool]] = None) -> List[PortInfo]:
+    """Reader ports present right now, sorted by device name."""
+    from serial.tools import list_ports
+
+    matcher = matcher or PortMatcher()
+    ports = (PortInfo(p.device, p.vid, p.pid, p.serial_number, p.description or "")
+             for p in list_ports.comports())
+    return sorted((port for port in ports if matcher(port)), key=lambda port: port.device)
+
+
+class PortMonitor:
+    """Keep a cached list of reader ports and report changes to it.
+
+    A background thread rescans every ``interval`` seconds and calls
+    ``on_change`` with the list of :class:`PortEvent` whenever ports come or
+    go. The callback runs on the monitor thread; GUI code should hand it to
+    the UI loop. :attr:`ports` is the cached device list, so nothing on the
+    caller's side has to enumerate ports itself. A failed scan is logged and
+    the cached list kept; the monitor carries on with the next scan.
+    """
+
+    def __init__(self, on_change: Callable[[List[PortEvent]], None],
+                 matcher: Optional[Callable[[PortInfo], bool]] = None,
+                 interval: float = RFIDReaderConfig.PORT_SCAN_INTERVAL):
+        self.on_change = on_change
+        self.matcher = matcher or PortMatcher()
+
+        self._known: Dict[str, PortInfo] = {}
+        self._lock = threading.Lock()
+        self.worker = ReaderWorker(self.refresh, period=interval, name="rfid-ports")
+
+    @property
+    def ports(self) -> List[str]:
+        with self._lock:
+            return sorted(self._known)
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
+
+    def refresh(self) -> List[PortEvent]:
+        """Rescan now; returns (and reports) what changed since the last scan."""
+        try:
+            current = {port.device: port for port in list_reader_ports(self.matcher)}
+        except Exception as e:
+            print(f"Port scan failed: {e}", file=sys.stderr)
+            return []
+        with self._lock:
+            events = [PortEvent(PORT_REMOVED, port) for device, port in self._known.items() if device not in current]
+            events += [PortEvent(PORT_ADDED, port) for device, port in current.items() if device not in self._known]
+            self._known = current
+
+        if events:
+            self.on_change(events)
+        return events
@@ -0,0 +1,343 @@
+"""Protocol helpers shared by the RFID reader applications."""
+from typing import Dict, List, NamedTuple, Union
+
+PRESET_VALUE = 0xFFFF
+POLYNOMIAL = 0x8408
+
+# Command codes (the Cmd / reCmd byte)
+CMD_INVENTORY = 0x01
+CMD_READ_DATA = 0x02
+CMD_WRITE_EPC = 0x04
+CMD_INVENTORY_SINGLE = 0x0F
+CMD_INVENTORY_BUFFER = 0x18
+CMD_GET_READER_INFO = 0x21
+CMD_SET_ADDRESS = 0x24
+CMD_SET_BAUD = 0x28
+CMD_GET_BUFFER = 0x72
+CMD_CLEAR_BUFFER = 0x73
+CMD_QUERY_BUFFER = 0x74
+
+INVENTORY_COMMANDS = frozenset((CMD_INVENTORY, CMD_INVENTORY_SINGLE))
+BUFFER_COUNT_COMMANDS = frozenset((CMD_INVENTORY_BUFFER, CMD_QUERY_BUFFER))
+
+# Parameter of the set-baud command for each supported rate
+BAUD_CODES = {
+    9600: 0,
+    19200: 1,
+    38400: 2,
+    57600: 5,
+    115200: 6,
+}
+
+# Response status codes (the Status byte of every reader reply)
+STATUS_SUCCESS = 0x00
+STATUS_INVENTORY_RETURNED = 0x01
+STATUS_INVENTORY_TIMEOUT = 0x02
+STATUS_MORE_DATA = 0x03
+STATUS_READER_FULL = 0x04
+STATUS_COMMAND_ERROR = 0xF9
+STATUS_POOR_COMMUNICATION = 0xFA
+STATUS_NO_TAG = 0xFB
+STATUS_TAG_ERROR = 0xFC
+STATUS_LENGTH_ERROR = 0xFD
+STATUS_ILLEGAL_COMMAND = 0xFE
+STATUS_PARAMETER_ERROR = 0xFF
+
+STATUS_MESSAGES = {
+    STATUS_SUCCESS: "Success",
+    STATUS_INVENTORY_RETURNED: "Inventory finished",
+    STATUS_INVENTORY_TIMEOUT: "Inventory scan time overflow",
+    STATUS_MORE_DATA: "More data",
+    STATUS_READER_FULL: "Reader memory full",
+    STATUS_COMMAND_ERROR: "Command execute error",
+    STATUS_POOR_COMMUNICATION: "Poor communication",
+    STATUS_NO_TAG: "No tag operable",
+    STATUS_TAG_ERROR: "Tag returned error",
+    STATUS_LENGTH_ERROR: "Command length wrong",
+    STATUS_ILLEGAL_COMMAND: "Illegal command",
+    STATUS_PARAMETER_ERROR: "Parameter error",
+}
+
+# Statuses that mean the reply carries usable data
+OK_STATUSES = frozenset((
+    STATUS_SUCCESS,
+    STATUS_INVENTORY_RETURNED,
+    STATUS_INVENTORY_TIMEOUT,
+    STATUS_MORE_DATA,
+    STATUS_READER_FULL,
+))
+
+
+def _build_crc_table() -> tuple:
+    """Precompute the CRC-16 (poly 0x8408, reflected) value of every byte."""
+    table = []
+    for byte in range(256):
+        crc_value = byte
+        for _ in range(8):
+            if crc_value & 0x0001:
+                crc_value = (crc_value >> 1) ^ POLYNOMIAL
+            else:
+                crc_value >>= 1
+        table.append(crc_value)
+    return tuple(table)
+
+
+CRC_TABLE = _build_crc_table()
+
+
+def crc16(data, crc_value: int = PRESET_VALUE) -> int:
+    """Run the table-driven CRC-16 over ``data`` starting from ``crc_value``."""
+    table = CRC_TABLE
+    for byte in data:
+        crc_value = (crc_value >> 8) ^ table[(crc_value ^ byte) & 0xFF]
+    return crc_value
+
+
+def parse_inventory(data) -> List[memoryview]:
+    """Split inventory reply data (Num, then Len + ID per tag) into tag IDs."""
+    view = memoryview(data)
+    end = len(view)
+    if not end:
+        return []
+
+    tags = []
+    pos = 1
+    for _ in range(view[0]):
+        if pos >= end:
+            break
+        length = view[pos]
+        pos += 1
+        if pos + length > end:
+            break
+        tags.append(view[pos:pos + length])
+        pos += length
+    return tags
+
+
+def parse_buffer(data) -> List[memoryview]:
+    """Split get-buffer reply data (Num, then Ant + Len + ID + RSSI + Count per tag) into tag IDs."""
+    view = memoryview(data)
+    end = len(view)
+    if not end:
+        return []
+
+    tags = []
+    pos = 1
+    for _ in range(view[0]):
+        if pos + 2 > end:
+            break
+        length = view[pos + 1]
+        pos += 2
+        if pos + length + 2 > end:
+            break
+        tags.append(view[pos:pos + length])
+        pos += length + 2
+    return tags
+
+
+class ResponseFrame(NamedTuple):
+    """One decoded reader reply: Len | Adr | reCmd | Status | Data | CRC."""
+    address: int
+    command: int
+    status: int
+    data: memoryview
+
+    @property
+    def ok(self) -> bool:
+        return self.status in OK_STATUSES
+
+    @property
+    def no_tag(self) -> bool:
+        return self.status == STATUS_NO_TAG
+
+    @property
+    def message(self) -> str:
+        return STATUS_MESSAGES.get(self.status, f"Status 0x{self.status:02X}")
+
+    @property
+    def buffer_count(self) -> int:
+        """Tags held in the reader's buffer, from an inventory-to-buffer or query-buffer reply."""
+        if self.command not in BUFFER_COUNT_COMMANDS or not self.ok or len(self.data) < 2:
+            return 0
+        return int.from_bytes(self.data[:2], 'big')
+
+    def tags(self) -> List[memoryview]:
+        """Tag IDs reported by an inventory or get-buffer reply (empty for anything else)."""
+        if not self.ok:
+            return []
+        if self.command in INVENTORY_COMMANDS:
+            return parse_inventory(self.data)
+        if self.command == CMD_GET_BUFFER:
+            return parse_buffer(self.data)
+        return []
+
+
+class FrameDecoder:
+    """Reassemble reader replies from arbitrary chunks of serial data.
+
+    Frames are length-prefixed, so a chunk may hold several frames or end in
+    the middle of one; the tail is kept until the next :meth:`feed`. Frame
+    data are memoryviews over the bytes passed in, not copies.
+    """
+    MIN_LENGTH = 5  # Adr + reCmd + Status + 2 CRC bytes
+
+    def __init__(self):
+        self._pending = bytearray()
+        self.crc_errors = 0
+        self.discarded = 0
+
+    def feed(self, chunk) -> List[ResponseFrame]:
+        """Decode every complete frame available after adding ``chunk``."""
+        if self._pending:
+            self._pending += chunk
+            view = memoryview(bytes(self._pending))
+            self._pending.clear()
+        else:
+            view = memoryview(chunk)
+
+        frames = []
+        pos = 0
+        end = len(view)
+        bad_until = 0  # end of the last frame counted as a CRC error
+        while pos < end:
+            length = view[pos]
+            if length < self.MIN_LENGTH:
+                # Not a plausible length byte: resynchronise on the next one
+                self.discarded += 1
+                pos += 1
+                continue
+
+            frame_end = pos + length + 1
+            if frame_end > end:
+                break
+
+            if crc16(view[pos:frame_end]) != 0:
+                # Resyncing steps through the bad frame's own bytes; any
+                # "frame" found in there is the same error, not a new one
+                if pos >= bad_until:
+                    self.crc_errors += 1
+                    bad_until = frame_end
+                resync = self._find_frame(view, pos + 1)
+                self.discarded += resync - pos
+                pos = resync
+                continue
+
+            frames.append(ResponseFrame(
+                address=view[pos + 1],
+                command=view[pos + 2],
+                status=view[pos + 3],
+                data=view[pos + 4:frame_end - 2],
+            ))
+            pos = frame_end
+
+        if pos < end:
+            self._pending += view[pos:]
+        return frames
+
+    def _find_frame(self, view: memoryview, start: int) -> int:
+        """Offset of the next complete, CRC-valid frame after a bad one.
+
+        Without this a corrupt byte that looks like a long length would hold
+        the following good frames back until enough junk had arrived.
+        """
+        end = len(view)
+        for pos in range(start, end):
+            length = view[pos]
+            frame_end = pos + length + 1
+            if length >= self.MIN_LENGTH and frame_end <= end and crc16(view[pos:frame_end]) == 0:
+                return pos
+        return start
+
+    def reset(self):
+        """Drop any partial frame, e.g. after reopening the port."""
+        self._pending.clear()
+
+
+class RFIDReaderConfig:
+    """Configuration constants and utility methods for RFID reader."""
+    PRESET_VALUE = PRESET_VALUE
+    POLYNOMIAL = POLYNOMIAL
+    NO_READER = 'FF'
+    SCAN_PERIOD = 0.05  # seconds between inventory polls
+    BAUD_RATE = 0  # 0 probes the common rates until the reader answers
+    TARGET_BAUD = 0  # e.g. 115200 switches the reader up after connecting (0 = leave it)
+    READER_USB_IDS = ((0x1A86, 0x7523), (0x1A86, 0x5523))  # CH340 / CH341 (VID, PID)
+    READER_SERIAL_NUMBERS = ()  # USB serial numbers of specific readers to accept as well
+    PORT_SCAN_INTERVAL = 1.0  # seconds between port rescans
+    MAX_EMPTY_READS = 5  # empty reads in a row before the port is reopened
+    RECONNECT_MIN = 0.1  # seconds, first reconnect backoff
+    RECONNECT_MAX = 1.0  # backoff cap, so a returning reader is picked up within a second
+    SCAN_MODE = 'poll'  # 'poll' reads tags every round, 'buffer' drains the reader's tag buffer
+    OUTBOX_PATH = 'rfid_outbox.db'
+    JOURNAL_PATH = 'rfid_journal.rfj'  # binary scan journal kept by the offline station
+    JOURNAL_MAX_BYTES = 16 * 1024 * 1024  # rotate after this size (~300k scans)
+    JOURNAL_BACKUPS = 10
+    HISTORY_PATH = 'rfid_history.db'  # local scan history for last-seen lookups
+    ALLOWLIST_URL = ''  # roster sync endpoint for offline verdicts; empty turns them off
+    ALLOWLIST_PATH = 'rfid_allowlist.json'
+    ALLOWLIST_SYNC_INTERVAL = 60.0  # seconds between roster deltas
+    ALLOWLIST_BLOOM = False  # Bloom filter instead of a set, for very large rosters
+    API_BATCH_SIZE = 0  # > 0 uploads scans in batches of up to this many
+    API_BATCH_WINDOW = 0.5  # seconds to collect a batch
+    API_CACHE_TTL = 300.0  # seconds a server answer is reused for repeat taps (0 = always ask)
+    API_CACHE_MAX_ENTRIES = 10000
+    DEDUP_WINDOW = 60.0  # seconds before the same tag is admitted again
+    DEDUP_MAX_ENTRIES = 100000
+    UI_FPS = 30
+    STATUS_HOLD = 1.5  # seconds a scan result stays up before idle messages return
+    METRICS_PORT = 0  # > 0 serves Prometheus metrics on http://127.0.0.1:<port>/metrics
+
+    @staticmethod
+    def calculate_crc(cmd: Union[str, bytes]) -> bytes:
+        """Calculate CRC for RFID command."""
+        cmd_bytes = bytes.fromhex(cmd) if isinstance(cmd, str) else bytes(cmd)
+        crc_value = crc16(cmd_bytes)
+        return cmd_bytes + bytes((crc_value & 0xFF, (crc_value >> 8) & 0xFF))
+
+    @staticmethod
+    def verify_crc(frame) -> bool:
+        """Check a complete frame whose last two bytes are its CRC."""
+        return len(frame) >= 3 and crc16(frame) == 0
+
+
+class RFIDCommands:
+    """RFID communication command templates."""
+
+    _frame_cache: Dict[str, Dict[str, bytes]] = {}
+
+    def __init__(self, no_reader: str):
+        self.INVENTORY1 = f'06 {no_reader} 01 00 06'  # Read TID
+        self.INVENTORY2 = f'04 {no_reader} 0F'  # Read EPC
+        self.READ_TAG_MEM = f'12 {no_reader} 02 02 11 22 33 44 01 00 04 00 00 00 00 00 02'
+        self.WRITE_EPC = '0F 03 04 03 00 00 00 00 11 22 33 44 55 66'
+        self.SET_ADDRESS = '05 03 24 00'
+        self.INVENTORY_BUFFER = f'06 {no_reader} 18 00 06'  # TID into the reader's buffer
+        self.GET_BUFFER = f'04 {no_reader} 72'
+        self.CLEAR_BUFFER = f'04 {no_reader} 73'
+        self.QUERY_BUFFER = f'04 {no_reader} 74'
+        self.GET_READER_INFO = f'04 {no_reader} 21'
+
+        self._no_reader = no_reader
+        self.frames = self._encode_frames(no_reader)
+
+    def _encode_frames(self, no_reader: str) -> Dict[str, bytes]:
+        """Encode every template once per reader address, CRC included."""
+        frames = RFIDCommands._frame_cache.get(no_reader)
+        if frames is None:
+            frames = {
+                name: RFIDReaderConfig.calculate_crc(template)
+                for name, template in vars(self).items()
+                if name.isupper()
+            }
+            RFIDCommands._frame_cache[no_reader] = frames
+        return frames
+
+    def frame(self, name: str) -> bytes:
+        """Ready-to-send bytes for the named command."""
+        return self.frames[name]
+
+    def set_baud(self, baud: int) -> bytes:
+        """Set-baud command frame for one of :data:`BAUD_CODES`."""
+        if baud not in BAUD_CODES:
+            raise ValueError(f"unsupported baud rate {baud}")
+        return RFIDReaderConfig.calculate_crc(f'05 {self._no_reader} 28 {BAUD_CODES[baud]:02X}')
@@ -0,0 +1,229 @@
+"""Reader-side threading helpers shared by the RFID reader applications."""
+import threading
+import time
+from typing import Callable, List, Optional
+
+from rfid_metrics import METRICS
+from rfid_protocol import (
+    RFIDReaderConfig, RFIDCommands, FrameDecoder, ResponseFrame,
+    CMD_INVENTORY, CMD_INVENTORY_BUFFER, CMD_GET_BUFFER, CMD_CLEAR_BUFFER, STATUS_MORE_DATA,
+)
+from rfid_serial import FrameTransport, Reconnector
+
+SCAN_MODES = ('poll', 'buffer')
+
+
+def read_buffer(transport: FrameTransport, commands: RFIDCommands) -> Optional[List[ResponseFrame]]:
+    """One buffer-mode round: inventory into the reader's buffer, then drain it.
+
+    The reader collects every tag it singulates into its own buffer, so a
+    crowd comes back in a few get-buffer frames instead of one host round
+    trip per inventory. The buffer is cleared only once the whole get-buffer
+    reply is in (its final frame arrived with a good CRC); if that reply is
+    lost or cut short the tags stay in the reader and are read again next
+    round. If the clear itself gets lost the same tags come back next round
+    and the dedup cache drops them. Returns None if the reader did not answer.
+    """
+    frames = transport.exchange(commands.frame('INVENTORY_BUFFER'), CMD_INVENTORY_BUFFER)
+    if frames is None:
+        return None
+
+    if any(reply.buffer_count for reply in frames):
+        contents = transport.exchange(commands.frame('GET_BUFFER'), CMD_GET_BUFFER) or []
+        frames += contents
+        last = contents[-1] if contents else None
+        if last is not None and last.command == CMD_GET_BUFFER and last.ok and last.status != STATUS_MORE_DATA:
+            transport.exchange(commands.frame('CLEAR_BUFFER'), CMD_CLEAR_BUFFER)
+    return frames
+
+
+class ReaderWorker:
+    """One long-lived thread that polls a reader on a fixed schedule.
+
+    Ticks are scheduled against ``time.monotonic()`` rather than "period
+    after the last poll finished", so slow polls don't stretch the cycle.
+    If a poll overruns a whole period the missed ticks are skipped instead
+    of being fired back to back.
+    """
+
+    def __init__(self, poll: Callable[[], None], period: float = 0.05,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 name: str = "rfid-reader"):
+        self.poll = poll
+        self.period = period
+        self.on_error = on_error
+        self.name = name
+
+        # Each thread gets its own stop event, so a thread still finishing
+        # its last poll can't be revived by a later start()
+        self._stop_event = threading.Event()
+        self._stop_event.set()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop_event.is_set()
+
+    def start(self):
+        """Start polling; does nothing if already running.
+
+        A thread told to stop but still inside its last poll is waited for
+        first, so two threads never poll the same port.
+        """
+        if self.running:
+            return
+        self.join()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the thread to finish after the poll in progress."""
+        self._stop_event.set()
+
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the thread to exit; a no-op from the thread itself."""
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self, stop_event: threading.Event):
+        next_tick = time.monotonic()
+        while not stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                stop_event.set()
+                if self.on_error:
+                    self.on_error(e)
+                break
+
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            if stop_event.wait(delay):
+                break
+
+
+class ScanSession:
+    """Poll one reader and hand every newly seen tag to ``on_tag``.
+
+    This is the scan -> decode -> dedup part of the apps without any UI, so
+    it can run headless or several times in one process. ``connection`` is
+    anything with pyserial's ``write``/``read``.
+
+    ``mode`` is ``'poll'`` (one inventory command per round) or ``'buffer'``
+    (see :func:`read_buffer`).
+
+    With ``reopen`` (a callable returning a freshly opened port) the session
+    rides out empty reads and port errors through a
+    :class:`~rfid_serial.Reconnector` instead of failing; ``on_state`` is
+    passed on to it.
+    """
+
+    def __init__(self, connection, position: str,
+                 on_tag: Callable[[str, str], None],
+                 dedup=None,
+                 period: float = RFIDReaderConfig.SCAN_PERIOD,
+                 no_reader: str = RFIDReaderConfig.NO_READER,
+                 mode: str = RFIDReaderConfig.SCAN_MODE,
+                 on_frame: Optional[Callable[[ResponseFrame], None]] = None,
+                 on_duplicate: Optional[Callable[[str, str], None]] = None,
+                 on_no_response: Optional[Callable[["ScanSession"], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 reopen: Optional[Callable[[], object]] = None,
+                 on_state: Optional[Callable[[Reconnector], None]] = None):
+        self.position = position
+        self.on_tag = on_tag
+        self.dedup = dedup
+        self.on_frame = on_frame
+        self.on_duplicate = on_duplicate
+        self.on_no_response = on_no_response
+        if mode not in SCAN_MODES:
+            raise ValueError(f"unknown scan mode {mode!r}")
+        self.mode = mode
+
+        self.commands = RFIDCommands(no_reader)
+        self.inventory_frame = self.commands.frame('INVENTORY1')
+        self.decoder = FrameDecoder()
+        self.transport = FrameTransport(connection, self.decoder)
+        self.reconnector = Reconnector(self.transport, reopen, on_state=on_state) if reopen else None
+        self.worker = ReaderWorker(self.poll, period=period, on_error=on_error,
+                                   name=f"rfid-reader-{position}")
+
+        self.polls = 0
+        self.empty_reads = 0
+        self.tags = 0
+        self.duplicates = 0
+
+    @property
+    def connection(self):
+        """The current port; replaced after a reconnect."""
+        return self.transport.connection
+
+    def start(self):
+        self.worker.start()
+
+    def stop(self):
+        self.worker.stop()
+
+    def poll(self):
+        """Run one inventory round."""
+        reconnector = self.reconnector
+        if reconnector is not None and not reconnector.try_reconnect():
+            return
+
+        self.polls += 1
+        METRICS.inc('polls')
+        started = time.perf_counter()
+        crc_errors = self.decoder.crc_errors
+        try:
+            if self.mode == 'buffer':
+                frames = read_buffer(self.transport, self.commands)
+            else:
+                frames = self.transport.exchange(self.inventory_frame, CMD_INVENTORY)
+        except OSError as e:
+            if reconnector is None:
+                raise
+            reconnector.lost(e)
+            return
+        read_done = time.perf_counter()
+        METRICS.observe('serial', read_done - started)
+
+        if frames is None:
+            self.empty_reads += 1
+            METRICS.inc('empty_reads')
+            if reconnector is not None:
+                reconnector.empty()
+            if self.on_no_response:
+                self.on_no_response(self)
+            return
+        if reconnector is not None:
+            reconnector.response()
+
+        uids = [tag.hex().upper() for frame in frames for tag in frame.tags()]
+        decoded = time.perf_counter()
+        METRICS.observe('decode', decoded - read_done)
+        if self.decoder.crc_errors != crc_errors:
+            METRICS.inc('crc_errors', self.decoder.crc_errors - crc_errors)
+
+        if self.on_frame:
+            for frame in frames:
+                self.on_frame(frame)
+
+        for uid in uids:
+            if self.dedup is not None:
+                checked = time.perf_counter()
+                duplicate = self.dedup.seen(self.position, uid)
+                METRICS.observe('dedup', time.perf_counter() - checked)
+                if duplicate:
+                    self.duplicates += 1
+                    METRICS.inc('duplicates')
+                    if self.on_duplicate:
+                        self.on_duplicate(self.position, uid)
+                    continue
+            self.tags += 1
+            METRICS.inc('tags')
+            self.on_tag(self.position, uid)
@@ -0,0 +1,433 @@
+"""Simulated UHF reader speaking the same framed protocol as the real one.
+
+The reader can be used in-process through :class:`SimulatedSerial` (a
+drop-in for ``serial.Serial``) or exposed on a pseudo-terminal with
+:class:`PtyReaderServer` so the GUI or the daemon can open it like a
+CH340 port::
+
+    python rfid_simulator.py --tags 25 --latency 0.01
+"""
+import argparse
+import collections
+import os
+import random
+import threading
+import time
+from typing import Deque, List, Optional, Tuple
+
+from rfid_protocol import (
+    RFIDReaderConfig,
+    CMD_INVENTORY, CMD_READ_DATA, CMD_WRITE_EPC, CMD_INVENTORY_SINGLE, CMD_SET_ADDRESS,
+    CMD_INVENTORY_BUFFER, CMD_GET_BUFFER, CMD_CLEAR_BUFFER, CMD_QUERY_BUFFER,
+    CMD_GET_READER_INFO, CMD_SET_BAUD, BAUD_CODES,
+    STATUS_SUCCESS, STATUS_INVENTORY_RETURNED, STATUS_MORE_DATA, STATUS_NO_TAG,
+    STATUS_ILLEGAL_COMMAND, STATUS_PARAMETER_ERROR, STATUS_LENGTH_ERROR,
+)
+
+MAX_DATA = 250  # 255 (largest Len) minus Adr, reCmd, Status and CRC
+BROADCAST = 0xFF
+
+MEM_RESERVED = 0
+MEM_EPC = 1
+MEM_TID = 2
+MEM_USER = 3
+
+
+class SimTag:
+    """One tag in the simulated field."""
+
+    def __init__(self, epc: bytes, tid: bytes, user: bytes = b''):
+        self.epc = bytes(epc)
+        self.tid = bytes(tid)
+        self.user = bytes(user)
+
+    def bank(self, mem: int) -> bytes:
+        if mem == MEM_RESERVED:
+            return bytes(8)
+        if mem == MEM_EPC:
+            # StoredCRC (left as zero) and PC word ahead of the EPC, as on a Gen2 tag
+            pc = (len(self.epc) // 2) << 11
+            return bytes(2) + pc.to_bytes(2, 'big') + self.epc
+        if mem == MEM_TID:
+            return self.tid
+        return self.user
+
+    def __repr__(self):
+        return f"SimTag(epc={self.epc.hex()}, tid={self.tid.hex()})"
+
+
+def random_tags(count: int, seed: Optional[int] = None) -> List[SimTag]:
+    """A population of tags with random 12-byte EPCs and E2-class TIDs."""
+    rng = random.Random(seed)
+    tags = []
+    for _ in range(count):
+        epc = bytes(rng.getrandbits(8) for _ in range(12))
+        tid = b'\xE2\x80\x11\x60' + bytes(rng.getrandbits(8) for _ in range(8))
+        tags.append(SimTag(epc, tid))
+    return tags
+
+
+class SimulatedReader:
+    """Protocol engine: turns command frames into response frames.
+
+    Supports inventory (0x01, with the optional TID address/length, and
+    single-tag 0x0F), read data (0x02), write EPC (0x04), set address
+    (0x24), get reader info (0x21), set baud (0x28) and the buffer commands
+    (inventory to buffer 0x18, get 0x72, clear 0x73, query 0x74). Anything else gets an "illegal command" (0xFE) reply. Frames with
+    a bad CRC or for another address are ignored, like the hardware does.
+
+    :class:`SimulatedSerial` only gets through when its ``baudrate`` matches
+    the reader's, which changes after a set-baud reply has gone out.
+
+    ``error_rate`` replaces replies with an error status frame (0xFB/0xFE),
+    ``corrupt_rate`` damages the reply CRC, and ``online = False`` makes the
+    reader stop answering altogether.
+    """
+
+    def __init__(self, tags: Optional[List[SimTag]] = None, address: int = 0x00,
+                 latency: float = 0.0, error_rate: float = 0.0, corrupt_rate: float = 0.0,
+                 seed: Optional[int] = None, baudrate: int = 57600):
+        self.tags = list(tags or [])
+        self.address = address
+        self.baudrate = baudrate
+        self.latency = latency
+        self.error_rate = error_rate
+        self.corrupt_rate = corrupt_rate
+        self.online = True
+
+        self.commands = 0
+        self.buffer = {}  # tag ID -> times read since the last clear
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle(self, frame: bytes) -> bytes:
+        """Reply bytes for one complete command frame (may be empty)."""
+        if not self.online or not RFIDReaderConfig.verify_crc(frame) or frame[0] != len(frame) - 1:
+            return b''
+        address, command, data = frame[1], frame[2], bytes(frame[3:-2])
+        if address not in (self.address, BROADCAST):
+            return b''
+
+        with self._lock:
+            self.commands += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                replies = [(command, self._rng.choice((STATUS_NO_TAG, STATUS_ILLEGAL_COMMAND)), b'')]
+            else:
+                replies = self._dispatch(command, data)
+            return b''.join(self._encode(command, status, payload) for command, status, payload in replies)
+
+    def _dispatch(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        handler = {
+            CMD_INVENTORY: self._inventory,
+            CMD_INVENTORY_SINGLE: self._inventory_single,
+            CMD_READ_DATA: self._read_data,
+            CMD_WRITE_EPC: self._write_epc,
+            CMD_SET_ADDRESS: self._set_address,
+            CMD_INVENTORY_BUFFER: self._inventory_buffer,
+            CMD_GET_BUFFER: self._get_buffer,
+            CMD_CLEAR_BUFFER: self._clear_buffer,
+            CMD_QUERY_BUFFER: self._query_buffer,
+            CMD_GET_READER_INFO: self._get_reader_info,
+            CMD_SET_BAUD: self._set_baud,
+        }.get(command)
+        if handler is None:
+            return [(command, STATUS_ILLEGAL_COMMAND, b'')]
+        return handler(command, data)
+
+    def _ids(self, data: bytes) -> List[bytes]:
+        """EPCs, or TID words when the inventory asks for AdrTID/LenTID."""
+        if len(data) >= 2:
+            start, length = data[0] * 2, data[1] * 2
+            return [tag.tid[start:start + length] for tag in self.tags]
+        return [tag.epc for tag in self.tags]
+
+    @staticmethod
+    def _split(command: int, records: List[bytes]) -> List[Tuple[int, int, bytes]]:
+        """Num + records over as many frames as needed; all but the last carry "more data"."""
+        chunks = []
+        chunk = []
+        size = 1
+        for record in records:
+            if size + len(record) > MAX_DATA:
+                chunks.append(chunk)
+                chunk, size = [], 1
+            chunk.append(record)
+            size += len(record)
+        chunks.append(chunk)
+
+        replies = []
+        for i, chunk in enumerate(chunks):
+            status = STATUS_INVENTORY_RETURNED if i == len(chunks) - 1 else STATUS_MORE_DATA
+            replies.append((command, status, bytes([len(chunk)]) + b''.join(chunk)))
+        return replies
+
+    def _inventory(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        ids = self._ids(data)
+        if not ids:
+            return [(command, STATUS_NO_TAG, b'')]
+        return self._split(command, [bytes([len(t)]) + t for t in ids])
+
+    def _inventory_buffer(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        ids = self._ids(data)
+        for tag_id in ids:
+            self.buffer[tag_id] = min(self.buffer.get(tag_id, 0) + 1, 0xFF)
+        if not ids and not self.buffer:
+            return [(command, STATUS_NO_TAG, b'')]
+        # BufferCount and TagNum (this round), both big-endian words
+        return [(command, STATUS_INVENTORY_RETURNED, len(self.buffer).to_bytes(2, 'big') + len(ids).to_bytes(2, 'big'))]
+
+    def _get_buffer(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        # Ant, Len, ID, RSSI, Count per tag
+        records = [bytes([1, len(t)]) + t + bytes([0xC8 + self._rng.randrange(32), count])
+                   for t, count in self.buffer.items()]
+        return self._split(command, records)
+
+    def _clear_buffer(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        self.buffer.clear()
+        return [(command, STATUS_SUCCESS, b'')]
+
+    def _query_buffer(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        return [(command, STATUS_SUCCESS, len(self.buffer).to_bytes(2, 'big'))]
+
+    def _inventory_single(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        if not self.tags:
+            return [(command, STATUS_NO_TAG, b'')]
+        epc = self.tags[0].epc
+        return [(command, STATUS_INVENTORY_RETURNED, bytes([1, len(epc)]) + epc)]
+
+    def _find(self, epc: bytes) -> Optional[SimTag]:
+        for tag in self.tags:
+            if tag.epc.startswith(epc) or epc.startswith(tag.epc):
+                return tag
+        return None
+
+    def _read_data(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        if len(data) < 1:
+            return [(command, STATUS_LENGTH_ERROR, b'')]
+        epc_len = data[0] * 2
+        if len(data) < 1 + epc_len + 7:
+            return [(command, STATUS_LENGTH_ERROR, b'')]
+        epc = data[1:1 + epc_len]
+        mem, word_ptr, count = data[1 + epc_len:4 + epc_len]
+
+        tag = self._find(epc)
+        if tag is None:
+            return [(command, STATUS_NO_TAG, b'')]
+        bank = tag.bank(mem)
+        start, end = word_ptr * 2, (word_ptr + count) * 2
+        if mem > MEM_USER or end > len(bank):
+            return [(command, STATUS_PARAMETER_ERROR, b'')]
+        return [(command, STATUS_SUCCESS, bank[start:end])]
+
+    def _write_epc(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        if len(data) < 5 or len(data) != 5 + data[0] * 2:
+            return [(command, STATUS_LENGTH_ERROR, b'')]
+        if not self.tags:
+            return [(command, STATUS_NO_TAG, b'')]
+        self.tags[0].epc = data[5:]
+        return [(command, STATUS_SUCCESS, b'')]
+
+    def _set_address(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        if len(data) != 1 or data[0] == BROADCAST:
+            return [(command, STATUS_PARAMETER_ERROR, b'')]
+        self.address = data[0]
+        return [(command, STATUS_SUCCESS, b'')]
+
+    def _get_reader_info(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        # Version, Type, Tr_Type, dmaxfre, dminfre, Power, Scntm
+        return [(command, STATUS_SUCCESS, bytes([0x03, 0x12, 0x09, 0x02, 0x4E, 0x00, 0x1E, 0x0A]))]
+
+    def _set_baud(self, command: int, data: bytes) -> List[Tuple[int, int, bytes]]:
+        rates = {code: baud for baud, code in BAUD_CODES.items()}
+        if len(data) != 1 or data[0] not in rates:
+            return [(command, STATUS_PARAMETER_ERROR, b'')]
+        self.baudrate = rates[data[0]]
+        return [(command, STATUS_SUCCESS, b'')]
+
+    def _encode(self, command: int, status: int, payload: bytes) -> bytes:
+        body = bytes([len(payload) + 5, self.address, command, status]) + payload
+        frame = bytearray(RFIDReaderConfig.calculate_crc(body))
+        if self.corrupt_rate and self._rng.random() < self.corrupt_rate:
+            frame[-1] ^= 0xFF
+        return bytes(frame)
+
+
+class _CommandSplitter:
+    """Cut the host's byte stream into command frames by their length byte."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buffer += data
+        frames = []
+        while self._buffer:
+            length = self._buffer[0]
+            if length < 4:
+                del self._buffer[0]
+                continue
+            if len(self._buffer) < length + 1:
+                break
+            frames.append(bytes(self._buffer[:length + 1]))
+            del self._buffer[:length + 1]
+        return frames
+
+
+class SimulatedSerial:
+    """In-process stand-in for ``serial.Serial`` wired to a SimulatedReader.
+
+    ``read`` follows pyserial's timeout rules, and replies become readable
+    only ``reader.latency`` seconds after the command was written.
+    """
+
+    def __init__(self, reader: SimulatedReader, timeout: Optional[float] = 0.1,
+                 baudrate: int = 57600, port: str = "sim://reader"):
+        self.reader = reader
+        self.timeout = timeout
+        self.baudrate = baudrate
+        self.port = port
+        self.is_open = True
+
+        self._splitter = _CommandSplitter()
+        self._ready = bytearray()
+        self._scheduled: Deque[Tuple[float, bytes]] = collections.deque()
+        self._cond = threading.Condition()
+
+    def write(self, data) -> int:
+        if not self.is_open:
+            raise OSError("port is closed")
+        if self.baudrate != self.reader.baudrate:
+            # Framing garbage on the reader's side: nothing comes back
+            return len(data)
+        now = time.monotonic()
+        for frame in self._splitter.feed(bytes(data)):
+            reply = self.reader.handle(frame)
+            if reply:
+                with self._cond:
+                    self._scheduled.append((now + self.reader.latency, reply))
+                    self._cond.notify_all()
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        if not self.is_open:
+            raise OSError("port is closed")
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                self._release(time.monotonic())
+                if len(self._ready) >= size:
+                    break
+                now = time.monotonic()
+                wait_until = deadline
+                if self._scheduled:
+                    ready_at = self._scheduled[0][0]
+                    wait_until = ready_at if wait_until is None else min(wait_until, ready_at)
+                if wait_until is not None and wait_until <= now:
+                    if deadline is not None and deadline <= now:
+                        break
+                    continue
+                self._cond.wait(None if wait_until is None else wait_until - now)
+
+            data = bytes(self._ready[:size])
+            del self._ready[:size]
+            return data
+
+    @property
+    def in_waiting(self) -> int:
+        with self._cond:
+            self._release(time.monotonic())
+            return len(self._ready)
+
+    def reset_input_buffer(self):
+        with self._cond:
+            self._ready.clear()
+            self._scheduled.clear()
+
+    def close(self):
+        self.is_open = False
+
+    def _release(self, now: float):
+        while self._scheduled and self._scheduled[0][0] <= now:
+            self._ready += self._scheduled.popleft()[1]
+
+
+class PtyReaderServer:
+    """Serve a SimulatedReader on a pseudo-terminal (POSIX only).
+
+    Open :attr:`port` with ``serial.Serial`` exactly like a real reader.
+    """
+
+    def __init__(self, reader: SimulatedReader):
+        import tty
+
+        self.reader = reader
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._splitter = _CommandSplitter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "PtyReaderServer":
+        self._thread = threading.Thread(target=self._serve, name="rfid-sim-pty", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        os.close(self._slave)
+        os.close(self._master)
+
+    def _serve(self):
+        import select
+
+        while not self._stop.is_set():
+            try:
+                readable, _, _ = select.select([self._master], [], [], 0.2)
+                if not readable:
+                    continue
+                data = os.read(self._master, 1024)
+            except OSError:
+                return
+            for frame in self._splitter.feed(data):
+                reply = self.reader.handle(frame)
+                if not reply:
+                    continue
+                if self.reader.latency:
+                    time.sleep(self.reader.latency)
+                try:
+                    os.write(self._master, reply)
+                except OSError:
+                    return
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated RFID reader on a pseudo-terminal')
+    parser.add_argument('--tags', type=int, default=5, help='Number of tags in the field')
+    parser.add_argument('--latency', type=float, default=0.005, help='Reply delay in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of replies turned into 0xFB/0xFE')
+    parser.add_argument('--corrupt-rate', type=float, default=0.0, help='Share of replies with a broken CRC')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    reader = SimulatedReader(random_tags(args.tags, args.seed), latency=args.latency,
+                             error_rate=args.error_rate, corrupt_rate=args.corrupt_rate, seed=args.seed)
+    server = PtyReaderServer(reader).start()
+    print(f"Simulated reader with {len(reader.tags)} tags on {server.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""Startup timing for the GUI apps, printed with ``--profile-startup``."""
+import argparse
+import sys
+import time
+from typing import Dict, Optional
+
+
+class StartupProfile:
+    """Record how long after ``started`` each startup milestone was reached.
+
+    Only the first :meth:`mark` of each name counts, so callers can mark
+    from callbacks that fire repeatedly. Disabled profiles record nothing.
+    """
+
+    def __init__(self, started: float, enabled: bool = True):
+        self.started = started
+        self.enabled = enabled
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        if not self.enabled or name in self.marks:
+            return
+        elapsed = time.perf_counter() - self.started
+        self.marks[name] = elapsed
+        # Windowed builds have no console to print to
+        if sys.stderr is not None:
+            print(f"startup: {name} after {elapsed * 1000:.0f} ms", file=sys.stderr, flush=True)
+
+
+def parse_startup_args(description: str, started: float, argv: Optional[list] = None) -> StartupProfile:
+    """Command-line options shared by the GUI entry points."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Print time to imports done, window shown and first reader poll')
+    args = parser.parse_args(argv)
+    return StartupProfile(started, args.profile_startup)
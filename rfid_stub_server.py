@@ -0,0 +1,212 @@
+"""Local stand-in for the registration API, for testing without the real server.
+
+Answers the per-tag ``GET ?pos=..&kode=..`` call and, unless started with
+``--no-batch``, the JSON ``POST {"events": [...]}`` batch call. Every event
+is recorded in arrival order so tests can check ordering, and ``--latency``
+adds a fixed server delay to mimic a slow link. ``accept_limit`` makes the
+batch call keep (and report as ``accepted``) only that many events, like a
+server that drops part of a batch, and a non-zero ``fail_status`` answers
+every report with that status (e.g. 503 from a proxy during an outage)
+without recording it.
+
+``GET .../roster?since=N`` serves the registered-UID roster that
+:mod:`rfid_allowlist` syncs from: the full list for ``since=0``, otherwise
+the UIDs added and removed after version N.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        stub = self.server.stub
+        stub.delay()
+        if url.path.endswith('/roster'):
+            try:
+                since = int(query.get('since', ['0'])[0])
+            except ValueError:
+                self._reply(400, {'error': 'bad since'})
+                return
+            self._reply(200, stub.roster_delta(since))
+            return
+        if 'kode' not in query:
+            self._reply(400, {'error': 'missing kode'})
+            return
+        if stub.fail_status:
+            self._reply(stub.fail_status, {'error': 'unavailable'})
+            return
+        stub.record([(query.get('pos', [''])[0], query['kode'][0])], batched=False)
+        self._reply(200, {'status': 'ok'})
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        stub.delay()
+        if not stub.batch:
+            self._reply(405, {'error': 'batch not supported'})
+            return
+        if stub.fail_status:
+            self._reply(stub.fail_status, {'error': 'unavailable'})
+            return
+
+        try:
+            events = json.loads(body)['events']
+            events = [(event.get('pos', ''), event['kode']) for event in events]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._reply(400, {'error': 'bad batch'})
+            return
+
+        if stub.accept_limit:
+            events = events[:stub.accept_limit]
+        stub.record(events, batched=True)
+        self._reply(200, {'accepted': len(events)})
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.stub.verbose:
+            super().log_message(format, *args)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubRegistrationServer"
+
+
+class StubRegistrationServer:
+    """In-process registration API stand-in running on a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 batch: bool = True, verbose: bool = False, accept_limit: int = 0,
+                 fail_status: int = 0):
+        self.latency = latency
+        self.batch = batch
+        self.accept_limit = accept_limit
+        self.fail_status = fail_status
+        self.verbose = verbose
+
+        self.events: List[Tuple[str, str]] = []
+        self.requests = 0
+        self.batch_requests = 0
+        self.roster_version = 0
+        self._roster: Dict[str, int] = {}  # UID -> version it was registered in
+        self._unregistered: Dict[str, int] = {}  # UID -> version it was removed in
+        self._lock = threading.Lock()
+
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.stub = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/web/rfid"
+
+    @property
+    def roster_url(self) -> str:
+        return f"{self.url}/roster"
+
+    def start(self) -> "StubRegistrationServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="rfid-stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._httpd.server_close()
+
+    def delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def record(self, events: List[Tuple[str, str]], batched: bool):
+        """Store (position, uid) events from one request, in arrival order."""
+        with self._lock:
+            self.events.extend(events)
+            if batched:
+                self.batch_requests += 1
+            else:
+                self.requests += 1
+
+    def register(self, *uids: str):
+        """Add UIDs to the roster as one new version."""
+        with self._lock:
+            self.roster_version += 1
+            for uid in uids:
+                self._roster[uid.upper()] = self.roster_version
+                self._unregistered.pop(uid.upper(), None)
+
+    def unregister(self, *uids: str):
+        """Remove UIDs from the roster as one new version."""
+        with self._lock:
+            self.roster_version += 1
+            for uid in uids:
+                if self._roster.pop(uid.upper(), None) is not None:
+                    self._unregistered[uid.upper()] = self.roster_version
+
+    def roster_delta(self, since: int) -> dict:
+        """The sync reply for a client at version ``since``."""
+        with self._lock:
+            version = self.roster_version
+            if since <= 0 or since > version:
+                return {'version': version, 'full': True, 'added': sorted(self._roster), 'removed': []}
+            return {
+                'version': version,
+                'full': False,
+                'added': sorted(uid for uid, added in self._roster.items() if added > since),
+                'removed': sorted(uid for uid, removed in self._unregistered.items() if removed > since),
+            }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the RFID registration API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to delay every response')
+    parser.add_argument('--no-batch', action='store_true', help='Reject batch POSTs like an older server')
+    parser.add_argument('--roster', default='', metavar='FILE',
+                        help='Registered UIDs, one per line, served on the roster sync endpoint')
+    args = parser.parse_args()
+
+    server = StubRegistrationServer(args.host, args.port, args.latency, batch=not args.no_batch, verbose=True)
+    if args.roster:
+        with open(args.roster, encoding='utf-8') as f:
+            server.register(*(line.strip() for line in f if line.strip()))
+    print(f"Serving stub registration API on {server.url} (roster sync on {server.roster_url})")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
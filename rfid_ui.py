@@ -0,0 +1,74 @@
+"""Thread-safe hand-off of UI updates to the Tk main loop."""
+import queue
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from rfid_metrics import METRICS
+
+
+class UiBridge:
+    """Let worker threads update widgets without touching Tk themselves.
+
+    Workers call :meth:`post` with a key; the Tk loop drains the queue every
+    frame via ``after()`` and applies only the newest update per key, so a
+    burst of reads costs one repaint per widget instead of one per read.
+
+    An update posted with ``hold`` keeps later plain updates for the same
+    key off screen for that many seconds, so e.g. a UID result is not
+    immediately replaced by the next "Card Not Detected" poll. The newest
+    update held back that way is applied once the hold runs out, so the
+    widget still ends up showing the current state.
+    """
+
+    def __init__(self, widget, fps: int = 30):
+        self.widget = widget
+        self.interval = max(1, int(1000 / fps))
+
+        self._queue = queue.SimpleQueue()
+        self._held_until: Dict[Hashable, float] = {}
+        self._deferred: Dict[Hashable, Tuple[Callable[..., Any], tuple, dict]] = {}
+        self._after_id = None
+
+    def post(self, key: Hashable, func: Callable[..., Any], *args, hold: float = 0.0, **kwargs):
+        """Schedule ``func(*args, **kwargs)`` on the Tk thread; safe from any thread."""
+        self._queue.put((key, func, args, kwargs, hold))
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.interval, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _drain(self):
+        latest: Dict[Hashable, Tuple[Callable[..., Any], tuple, dict]] = {}
+        now = time.monotonic()
+        held_until = self._held_until
+        deferred = self._deferred
+        try:
+            while True:
+                key, func, args, kwargs, hold = self._queue.get_nowait()
+                if hold:
+                    held_until[key] = now + hold
+                    deferred.pop(key, None)
+                elif held_until.get(key, 0) > now:
+                    deferred[key] = (func, args, kwargs)
+                    continue
+                latest[key] = (func, args, kwargs)
+        except queue.Empty:
+            pass
+
+        for key in [key for key in deferred if held_until.get(key, 0) <= now]:
+            update = deferred.pop(key)
+            # Anything posted since the hold ran out is newer
+            latest.setdefault(key, update)
+
+        try:
+            for func, args, kwargs in latest.values():
+                func(*args, **kwargs)
+            if latest:
+                METRICS.observe('ui', time.monotonic() - now)
+        finally:
+            self._after_id = self.widget.after(self.interval, self._drain)
@@ -0,0 +1,70 @@
+"""ApiDispatcher batch delivery against the stub registration server."""
+import time
+
+from rfid_dispatch import ApiDispatcher
+from rfid_outbox import Outbox
+from rfid_stub_server import StubRegistrationServer
+
+EVENTS = [('1', 'E200AA'), ('1', 'E200BB'), ('2', 'E200CC')]
+
+
+def test_confirmed_batch_is_delivered_in_order():
+    with StubRegistrationServer() as stub:
+        dispatcher = ApiDispatcher(stub.url, batch_size=10)
+        results = dispatcher.send_batch(stub.url, EVENTS)
+    assert all(result.delivered for result in results)
+    assert stub.events == EVENTS
+    assert (stub.batch_requests, stub.requests) == (1, 0)
+    assert dispatcher.batch_supported
+
+
+def test_unsupported_batch_falls_back_to_get():
+    with StubRegistrationServer(batch=False) as stub:
+        dispatcher = ApiDispatcher(stub.url, batch_size=10)
+        results = dispatcher.send_batch(stub.url, EVENTS)
+    assert all(result.delivered for result in results)
+    assert stub.events == EVENTS
+    assert stub.requests == len(EVENTS)
+    assert not dispatcher.batch_supported
+
+
+def test_partly_accepted_batch_falls_back_to_get():
+    with StubRegistrationServer(accept_limit=1) as stub:
+        dispatcher = ApiDispatcher(stub.url, batch_size=10)
+        results = dispatcher.send_batch(stub.url, EVENTS)
+    assert all(result.delivered for result in results)
+    assert stub.events == EVENTS[:1] + EVENTS
+    assert stub.requests == len(EVENTS)
+    assert not dispatcher.batch_supported
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_queued_batches_keep_scan_order():
+    scans = [(str(i % 3), f'E200{i:04X}') for i in range(40)]
+    with StubRegistrationServer() as stub:
+        dispatcher = ApiDispatcher(stub.url, batch_size=8, batch_window=0.05)
+        for position, uid in scans:
+            assert dispatcher.submit(position, uid)
+        _wait_for(lambda: len(stub.events) == len(scans))
+        dispatcher.close()
+    assert stub.events == scans
+    assert stub.requests == 0 and stub.batch_requests >= len(scans) // 8
+
+
+def test_outbox_batches_keep_scan_order(tmp_path):
+    scans = [(str(i % 3), f'E200{i:04X}') for i in range(40)]
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    with StubRegistrationServer() as stub:
+        dispatcher = ApiDispatcher(stub.url, outbox=outbox, batch_size=8, batch_window=0.05)
+        for position, uid in scans:
+            dispatcher.submit(position, uid)
+        _wait_for(lambda: len(outbox) == 0)
+        dispatcher.close()
+    assert stub.events == scans
+    assert stub.requests == 0
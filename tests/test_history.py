@@ -0,0 +1,59 @@
+"""ScanHistory queries, the hourly rollup and read-only access."""
+import sqlite3
+
+import pytest
+
+from rfid_history import HOUR, HourlyCount, ScanHistory, Sighting
+
+T0 = 1000 * HOUR  # on an hour boundary
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = ScanHistory(str(tmp_path / 'history.db'))
+    history.add('1', 'E200AA', T0 + 10)
+    history.add('2', 'E200AA', T0 + 20)
+    history.add('1', 'E200BB', T0 + 30)
+    history.add('1', 'E200AA', T0 + HOUR + 5)
+    history.flush()
+    yield history
+    history.close()
+
+
+def test_sightings_newest_first(history):
+    assert len(history) == 4
+    assert history.last_seen('E200AA') == Sighting('E200AA', '1', T0 + HOUR + 5)
+    assert history.last_seen('E200CC') is None
+    assert [s.timestamp for s in history.sightings('E200AA', limit=2)] == [T0 + HOUR + 5, T0 + 20]
+
+
+def test_at_position(history):
+    assert [s.uid for s in history.at_position('1')] == ['E200AA', 'E200BB', 'E200AA']
+    assert [s.uid for s in history.at_position('1', since=T0 + HOUR)] == ['E200AA']
+
+
+def test_hourly_rollup(history):
+    assert history.counts_per_position() == [('1', 3), ('2', 1)]
+    assert history.counts_per_hour(position='1') == [
+        HourlyCount(T0, '1', 2),
+        HourlyCount(T0 + HOUR, '1', 1),
+    ]
+    assert history.counts_per_position(since=T0 + HOUR) == [('1', 1)]
+
+
+def test_writer_thread_batches_scans(tmp_path):
+    history = ScanHistory(str(tmp_path / 'history.db'), batch_window=0.01)
+    history.start()
+    for i in range(50):
+        history.add('1', f'E200{i:04X}', T0 + i)
+    history.close()
+
+    reopened = ScanHistory(str(tmp_path / 'history.db'), readonly=True)
+    assert len(reopened) == 50
+    assert reopened.counts_per_position() == [('1', 50)]
+    reopened.close()
+
+
+def test_readonly_needs_an_existing_database(tmp_path):
+    with pytest.raises(sqlite3.Error):
+        ScanHistory(str(tmp_path / 'missing.db'), readonly=True).last_seen('E200AA')
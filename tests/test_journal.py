@@ -0,0 +1,69 @@
+"""ScanJournal rotation, torn records and the shift summary."""
+import os
+
+import pytest
+
+from rfid_journal import (HEADER, RECORD, STATUS_DUPLICATE, JournalReader, ScanJournal,
+                          journal_files, read_journal, summarize)
+
+
+def _fill(path, count, max_bytes=HEADER.size + 4 * RECORD.size, backups=2):
+    journal = ScanJournal(path, max_bytes, backups)
+    for i in range(count):
+        journal.append('1', f'E200{i:04X}', timestamp=float(i))
+    journal.close()
+
+
+def test_rotation_keeps_the_newest_records(tmp_path):
+    path = str(tmp_path / 'scans.rfj')
+    _fill(path, 14)
+    assert journal_files(path) == [f'{path}.2', f'{path}.1', path]
+    assert not os.path.exists(f'{path}.3')
+    # Four records per file; the first file went when the fourth was started
+    assert [record.timestamp for record in read_journal(path)] == [float(i) for i in range(4, 14)]
+
+
+def test_rotation_without_backups(tmp_path):
+    path = str(tmp_path / 'scans.rfj')
+    _fill(path, 6, backups=0)
+    assert journal_files(path) == [path]
+    assert len(list(read_journal(path))) == 2
+
+
+def test_torn_record_is_ignored_and_cut_off(tmp_path):
+    path = str(tmp_path / 'scans.rfj')
+    _fill(path, 3, max_bytes=1 << 20)
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (RECORD.size // 2))
+
+    with JournalReader(path) as reader:
+        assert len(reader) == 3
+    journal = ScanJournal(path)
+    assert os.path.getsize(path) == HEADER.size + 3 * RECORD.size
+    journal.append('2', 'E200FFFF', timestamp=3.0)
+    journal.close()
+    assert [record.uid for record in read_journal(path)][-1] == 'E200FFFF'
+
+
+def test_not_a_journal(tmp_path):
+    path = tmp_path / 'scans.rfj'
+    path.write_bytes(b'not a journal at all')
+    with pytest.raises(ValueError):
+        JournalReader(str(path))
+
+
+def test_summary(tmp_path):
+    path = str(tmp_path / 'scans.rfj')
+    journal = ScanJournal(path)
+    journal.append('1', 'E200AA', timestamp=10.0)
+    journal.append('1', 'E200AA', STATUS_DUPLICATE, timestamp=11.0)
+    journal.append('2', 'E200AA', timestamp=12.0)
+    journal.append('2', 'E200BB', timestamp=13.0)
+    journal.close()
+
+    summary = summarize(path)
+    assert summary.records == 4
+    assert (summary.first, summary.last) == (10.0, 13.0)
+    assert summary.per_position == {'1': 1, '2': 2}
+    assert (summary.unique_uids, summary.duplicates) == (2, 1)
+    assert summarize(path, since=12.0).per_position == {'2': 2}
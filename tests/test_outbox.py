@@ -0,0 +1,72 @@
+"""Outbox persistence and the dispatcher's retry behaviour against the stub server."""
+import time
+
+from rfid_dispatch import ApiDispatcher
+from rfid_outbox import Outbox
+from rfid_stub_server import StubRegistrationServer
+
+EVENTS = [('1', 'E200AA'), ('1', 'E200BB'), ('2', 'E200CC')]
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _dispatcher(url, outbox, retry_min=0.01, retry_max=0.05):
+    dispatcher = ApiDispatcher(url, workers=1, outbox=outbox)  # one worker keeps arrival order
+    dispatcher.RETRY_MIN = retry_min
+    dispatcher.RETRY_MAX = retry_max
+    dispatcher.MAX_ATTEMPTS = 2
+    return dispatcher
+
+
+def test_outage_delays_but_never_dead_letters(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    with StubRegistrationServer(fail_status=503) as stub:
+        dispatcher = _dispatcher(stub.url, outbox)
+        for position, uid in EVENTS:
+            dispatcher.submit(position, uid)
+        _wait_for(lambda: min(event.attempts for event in outbox.peek(now=float('inf'))) >= 5)
+        assert outbox.dead_letters() == []
+
+        stub.fail_status = 0
+        _wait_for(lambda: len(outbox) == 0)
+        dispatcher.close()
+    assert sorted(stub.events) == sorted(EVENTS)
+    assert outbox.dead_letters() == []
+
+
+def test_backlog_is_retried_as_soon_as_a_delivery_succeeds(tmp_path):
+    outbox = Outbox(str(tmp_path / 'outbox.db'))
+    with StubRegistrationServer(fail_status=503) as stub:
+        dispatcher = _dispatcher(stub.url, outbox, retry_min=30.0, retry_max=60.0)
+        for position, uid in EVENTS:
+            dispatcher.submit(position, uid)
+        _wait_for(lambda: len(outbox.peek()) == 0)  # all backing off for 30 s
+
+        stub.fail_status = 0
+        dispatcher.submit('3', 'E200DD')
+        _wait_for(lambda: len(outbox) == 0)
+        dispatcher.close()
+    # The new scan gets through first, then the backlog follows in order
+    assert stub.events == [('3', 'E200DD')] + EVENTS
+
+
+def test_events_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'outbox.db')
+    with StubRegistrationServer() as stub:
+        outbox = Outbox(path)
+        for position, uid in EVENTS:
+            outbox.add(stub.url, position, uid)
+        outbox.close()
+
+        outbox = Outbox(path)
+        assert [(event.position, event.uid) for event in outbox.peek()] == EVENTS
+        dispatcher = _dispatcher(stub.url, outbox)
+        dispatcher.start()
+        _wait_for(lambda: len(outbox) == 0)
+        dispatcher.close()
+    assert stub.events == EVENTS
@@ -0,0 +1,27 @@
+"""Sinks behind the scan pipeline."""
+import pytest
+
+from rfid_journal import STATUS_DUPLICATE, STATUS_NEW, ScanJournal, read_journal
+from rfid_pipeline import JournalSink, ScanEvent, Sink
+
+
+def test_journal_sink_records_one_duplicate_per_window(tmp_path):
+    path = str(tmp_path / 'scans.rfj')
+    sink = JournalSink(ScanJournal(path), duplicate_window=60.0)
+    sink.start()
+    sink.put(ScanEvent('1', 'E200AA', 1.0))
+    for _ in range(20):
+        sink.put_duplicate('1', 'E200AA')
+    sink.put_duplicate('2', 'E200AA')
+    sink.stop()
+
+    statuses = [record.status for record in read_journal(path)]
+    assert statuses == [STATUS_NEW, STATUS_DUPLICATE, STATUS_DUPLICATE]
+
+
+def test_sink_without_handle_fails_at_construction():
+    class Forgetful(Sink):
+        pass
+
+    with pytest.raises(TypeError):
+        Forgetful()
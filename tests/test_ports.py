@@ -0,0 +1,26 @@
+"""PortMonitor keeps its cached port list across failed scans."""
+import rfid_ports
+from rfid_ports import PORT_ADDED, PORT_REMOVED, PortInfo, PortMonitor
+
+COM3 = PortInfo('COM3', 0x1A86, 0x7523, None, 'USB-SERIAL CH340')
+
+
+def test_failed_scan_keeps_ports_and_monitor(monkeypatch):
+    scans = [[COM3], OSError('comports failed'), [COM3], []]
+
+    def scan(matcher=None):
+        result = scans.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(rfid_ports, 'list_reader_ports', scan)
+    changes = []
+    monitor = PortMonitor(changes.append)
+
+    assert [event.kind for event in monitor.refresh()] == [PORT_ADDED]
+    assert monitor.refresh() == []
+    assert monitor.ports == ['COM3']
+    assert monitor.refresh() == []
+    assert [event.kind for event in monitor.refresh()] == [PORT_REMOVED]
+    assert len(changes) == 2
@@ -0,0 +1,56 @@
+"""FrameDecoder on split, concatenated and corrupt reader replies."""
+from rfid_protocol import CMD_INVENTORY, FrameDecoder, RFIDCommands, RFIDReaderConfig
+from rfid_simulator import SimulatedReader, random_tags
+
+INVENTORY = RFIDCommands(RFIDReaderConfig.NO_READER).frames['INVENTORY1']
+
+
+def _reply(tags=2):
+    return SimulatedReader(tags=random_tags(tags, seed=1)).handle(INVENTORY)
+
+
+def _corrupt(reply):
+    return reply[:-1] + bytes([reply[-1] ^ 0xFF])
+
+
+def test_whole_reply():
+    frames = FrameDecoder().feed(_reply())
+    assert len(frames) == 1
+    assert frames[0].command == CMD_INVENTORY and frames[0].ok
+    assert len(frames[0].tags()) == 2
+
+
+def test_reply_split_at_every_byte():
+    reply = _reply()
+    for cut in range(1, len(reply)):
+        decoder = FrameDecoder()
+        assert decoder.feed(reply[:cut]) == []
+        frames = decoder.feed(reply[cut:])
+        assert len(frames) == 1 and len(frames[0].tags()) == 2
+
+
+def test_reply_fed_byte_by_byte():
+    decoder = FrameDecoder()
+    frames = []
+    for byte in _reply():
+        frames += decoder.feed(bytes([byte]))
+    assert len(frames) == 1
+
+
+def test_concatenated_replies():
+    frames = FrameDecoder().feed(_reply(1) + _reply(2) + _reply(3))
+    assert [len(frame.tags()) for frame in frames] == [1, 2, 3]
+
+
+def test_corrupt_reply_is_counted_once_and_skipped():
+    decoder = FrameDecoder()
+    frames = decoder.feed(_corrupt(_reply(3)) + _reply(2))
+    assert [len(frame.tags()) for frame in frames] == [2]
+    assert decoder.crc_errors == 1
+
+
+def test_frames_are_views_not_copies():
+    reply = _reply()
+    frame, = FrameDecoder().feed(reply)
+    assert isinstance(frame.data, memoryview)
+    assert frame.data.obj is reply
@@ -0,0 +1,77 @@
+"""Buffer-mode rounds and the ReaderWorker schedule."""
+import threading
+import time
+
+from rfid_cache import DedupCache
+from rfid_protocol import CMD_GET_BUFFER
+from rfid_reader import ReaderWorker, ScanSession
+from rfid_simulator import SimulatedReader, SimulatedSerial, random_tags
+
+
+def _buffer_session(reader):
+    seen = []
+    session = ScanSession(SimulatedSerial(reader, timeout=0.02), '1', lambda position, uid: seen.append(uid),
+                          dedup=DedupCache(), mode='buffer')
+    return session, seen
+
+
+def test_buffer_round_reports_and_clears():
+    reader = SimulatedReader(tags=random_tags(4, seed=1))
+    session, seen = _buffer_session(reader)
+    session.poll()
+    assert len(seen) == 4
+    assert reader.buffer == {}
+
+
+def test_lost_get_buffer_reply_keeps_the_buffer():
+    reader = SimulatedReader(tags=random_tags(4, seed=1))
+    session, seen = _buffer_session(reader)
+    handle = reader.handle
+    reader.handle = lambda frame: b'' if frame[2] == CMD_GET_BUFFER else handle(frame)
+    session.poll()
+    assert seen == []
+    assert len(reader.buffer) == 4
+
+    # The tags have left the field, but the reader still holds them
+    reader.tags = []
+    reader.handle = handle
+    session.poll()
+    assert len(seen) == 4
+    assert reader.buffer == {}
+
+
+def test_worker_restart_never_overlaps():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def poll():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.01)
+        with lock:
+            active.pop()
+
+    worker = ReaderWorker(poll, period=0.001)
+    for _ in range(10):
+        worker.start()
+        time.sleep(0.005)
+        worker.stop()
+        worker.start()
+    worker.stop()
+    worker.join()
+    assert max(peak) == 1
+
+
+def test_worker_reports_error_and_stops():
+    errors = []
+
+    def poll():
+        raise RuntimeError("boom")
+
+    worker = ReaderWorker(poll, period=0.001, on_error=errors.append)
+    worker.start()
+    worker.join(1.0)
+    assert not worker.running
+    assert [str(e) for e in errors] == ["boom"]
@@ -0,0 +1,55 @@
+"""FrameTransport and ScanSession against the simulated reader, including line noise."""
+import pytest
+
+from rfid_protocol import RFIDCommands, RFIDReaderConfig, CMD_INVENTORY
+from rfid_cache import DedupCache
+from rfid_reader import ScanSession
+from rfid_serial import FrameTransport
+from rfid_simulator import SimulatedReader, SimulatedSerial, random_tags
+
+INVENTORY = RFIDCommands(RFIDReaderConfig.NO_READER).frames['INVENTORY1']
+
+
+def _session(tags=3, **reader_args):
+    reader = SimulatedReader(tags=random_tags(tags, seed=1), **reader_args)
+    seen = []
+    session = ScanSession(SimulatedSerial(reader), '1', lambda position, uid: seen.append(uid),
+                          dedup=DedupCache())
+    return session, seen
+
+
+def test_exchange_returns_inventory():
+    transport = FrameTransport(SimulatedSerial(SimulatedReader(tags=random_tags(2, seed=1))))
+    frames = transport.exchange(INVENTORY, CMD_INVENTORY)
+    assert frames and len(frames[-1].tags()) == 2
+
+
+@pytest.mark.parametrize('junk', [b'\x00', b'\x00\x00\x00', b'\x01\x02', b'\x04', b'\x03\x02\x01'])
+def test_exchange_skips_junk_before_reply(junk):
+    connection = SimulatedSerial(SimulatedReader(tags=random_tags(2, seed=1)))
+    connection._ready += junk
+    frames = FrameTransport(connection).exchange(INVENTORY, CMD_INVENTORY)
+    assert frames and len(frames[-1].tags()) == 2
+
+
+def test_exchange_with_only_junk_returns_none():
+    connection = SimulatedSerial(SimulatedReader(), timeout=0.01)
+    connection.write = lambda data: len(data)  # the reader never answers
+    connection._ready += b'\x00'
+    assert FrameTransport(connection).exchange(INVENTORY, CMD_INVENTORY) is None
+
+
+def test_poll_survives_stray_zero_byte():
+    session, seen = _session()
+    session.connection._ready += b'\x00'
+    session.poll()
+    session.poll()
+    assert len(seen) == 3
+
+
+def test_poll_survives_corrupt_replies():
+    session, seen = _session(corrupt_rate=0.3, seed=7)
+    for _ in range(100):
+        session.poll()
+    assert len(seen) == 3
+    assert 0 < session.decoder.crc_errors <= 100